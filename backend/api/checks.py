@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.checks import Error, Tags, register
+
+from api.services.cache_helper import VERSION_CACHE_ALIAS, is_shared_cache
+
+# Кэши, на которых держатся поколения данных и журнал индекса рецептов.
+SHARED_CACHE_ALIASES = (DEFAULT_CACHE_ALIAS, VERSION_CACHE_ALIAS)
+
+
+@register(Tags.caches)
+def check_shared_caches(app_configs, **kwargs):
+    """Кэши default и versions — memcached или Redis."""
+    if not settings.SHARED_CACHE_REQUIRED:
+        return []
+    return [
+        Error(
+            f"Кэш {alias!r} должен быть общим для процессов и атомарным: "
+            f"{settings.CACHES[alias]['BACKEND']} не подходит.",
+            hint=(
+                "Укажите memcached или Redis в CACHE_BACKEND и "
+                "VERSION_CACHE_BACKEND или SHARED_CACHE_REQUIRED=False "
+                "для одного процесса."
+            ),
+            obj=alias,
+            id="api.E001",
+        )
+        for alias in SHARED_CACHE_ALIASES
+        if not is_shared_cache(caches[alias])
+    ]
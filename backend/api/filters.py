@@ -1,6 +1,10 @@
 from django_filters.rest_framework import FilterSet, filters
 
-from recipes.models import Ingredient, Tag, Recipe
+from api.services.membership import get_membership
+from api.services.recipe_index import filter_by_ingredients
+from api.services.search import search_recipes
+from api.services.tag_mask import filter_by_tags, get_tag_choices
+from recipes.models import Ingredient, Recipe
 
 
 class IngredientFilter(FilterSet):
@@ -11,11 +15,14 @@ class IngredientFilter(FilterSet):
         fields = ["name"]
 
 
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    pass
+
+
 class RecipeFilter(FilterSet):
-    tags = filters.ModelMultipleChoiceFilter(
-        queryset=Tag.objects.all(),
-        field_name="tags__slug",
-        to_field_name="slug",
+    tags = filters.MultipleChoiceFilter(
+        choices=get_tag_choices,
+        method="get_tags",
     )
     is_favorited = filters.BooleanFilter(
         method="get_is_favorited",
@@ -23,17 +30,61 @@ class RecipeFilter(FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method="get_is_in_shopping_cart"
     )
+    search = filters.CharFilter(method="get_search")
+    has_ingredients = NumberInFilter(method="get_has_ingredients")
+    exclude_ingredients = NumberInFilter(method="get_exclude_ingredients")
+    max_missing = filters.NumberFilter(method="get_max_missing", min_value=0)
 
     class Meta:
         model = Recipe
-        fields = ("author", "tags", "is_favorited", "is_in_shopping_cart")
+        fields = (
+            "author",
+            "tags",
+            "is_favorited",
+            "is_in_shopping_cart",
+            "search",
+            "has_ingredients",
+            "exclude_ingredients",
+            "max_missing",
+        )
 
-    def get_is_favorited(self, queryset, name, value):
+    def filter_membership(self, queryset, kind, value):
+        """Отбор по id из принадлежности пользователя без JOIN."""
         if self.request.user.is_authenticated and value:
-            return queryset.filter(favorites__user=self.request.user)
+            ids = get_membership(self.request.user).ids(kind)
+            return queryset.filter(id__in=list(ids))
         return queryset
 
+    def get_tags(self, queryset, name, value):
+        """Отбор по маске тегов рецепта."""
+        return filter_by_tags(queryset, value)
+
+    def get_is_favorited(self, queryset, name, value):
+        return self.filter_membership(queryset, "favorites", value)
+
     def get_is_in_shopping_cart(self, queryset, name, value):
-        if self.request.user.is_authenticated and value:
-            return queryset.filter(carts__user=self.request.user)
+        return self.filter_membership(queryset, "carts", value)
+
+    def get_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию, ингредиентам и описанию."""
+        return search_recipes(queryset, value)
+
+    def get_has_ingredients(self, queryset, name, value):
+        """Рецепты из имеющихся ингредиентов по обратному индексу."""
+        data = self.form.cleaned_data
+        return filter_by_ingredients(
+            queryset,
+            [int(item) for item in value],
+            [int(item) for item in data.get("exclude_ingredients") or ()],
+            int(data.get("max_missing") or 0),
+        )
+
+    def get_exclude_ingredients(self, queryset, name, value):
+        """Без has_ingredients исключение выполняется в базе."""
+        if self.form.cleaned_data.get("has_ingredients"):
+            return queryset
+        return queryset.exclude(recipe_ingredients__ingredient__in=value)
+
+    def get_max_missing(self, queryset, name, value):
+        """Учитывается в get_has_ingredients."""
         return queryset
@@ -0,0 +1,152 @@
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from api.services.metrics import IN_PROGRESS, observe_request
+
+logger = logging.getLogger(__name__)
+
+
+def get_view_name(view_func, method):
+    """Имя вида для логов: RecipeViewSet.list, UserViewSet.me и т. п."""
+    view_class = getattr(view_func, "cls", None)
+    if view_class is None:
+        return f"{view_func.__module__}.{view_func.__name__}"
+    actions = getattr(view_func, "actions", None) or {}
+    return f"{view_class.__name__}.{actions.get(method, method)}"
+
+
+class RequestTiming:
+    """Замеры одного запроса: SQL по фазам и отметки времени фаз."""
+
+    def __init__(self):
+        self.view_name = None
+        self.phase = "request"
+        self.marks = {"request": time.perf_counter()}
+        self.queries = []
+
+    def mark(self, phase):
+        self.phase = phase
+        self.marks[phase] = time.perf_counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                (sql, time.perf_counter() - started, self.phase)
+            )
+
+    def phase_duration(self, phase, end_phase):
+        if phase not in self.marks:
+            return 0.0
+        end = self.marks.get(end_phase, self.marks["done"])
+        return end - self.marks[phase]
+
+    def db_duration(self, phase=None):
+        return sum(
+            duration
+            for _, duration, query_phase in self.queries
+            if phase is None or query_phase == phase
+        )
+
+    def get_metrics(self):
+        """Длительности в миллисекундах."""
+        view = self.phase_duration("view", "render")
+        render = self.phase_duration("render", "rendered")
+        return {
+            "db": self.db_duration() * 1000,
+            "view": max(view - self.db_duration("view"), 0) * 1000,
+            "render": max(render - self.db_duration("render"), 0) * 1000,
+            "total": (self.marks["done"] - self.marks["request"]) * 1000,
+        }
+
+    def get_duplicates(self, threshold):
+        """Повторяющиеся шаблоны SQL: вероятные N+1."""
+        counts = Counter(sql for sql, _, _ in self.queries)
+        return {
+            sql: count for sql, count in counts.items() if count >= threshold
+        }
+
+
+class RequestTimingMiddleware:
+    """Server-Timing, X-Query-Count, лог и метрики Prometheus для запросов.
+
+    Время view — весь код вида без SQL: права, фильтры, запросы к кешу
+    и сериализация вместе; отдельно от него меряется только render.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = RequestTiming()
+        request.timing = timing
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timing))
+            stack.enter_context(IN_PROGRESS.track_inprogress())
+            response = self.get_response(request)
+        timing.mark("done")
+        observe_request(request, response, timing)
+        metrics = timing.get_metrics()
+        response["Server-Timing"] = ", ".join(
+            (
+                f'db;dur={metrics["db"]:.1f};'
+                f'desc="{len(timing.queries)} queries"',
+                f"view;dur={metrics['view']:.1f}",
+                f"render;dur={metrics['render']:.1f}",
+                f"total;dur={metrics['total']:.1f}",
+            )
+        )
+        if settings.QUERY_COUNT_HEADER:
+            response["X-Query-Count"] = str(len(timing.queries))
+        self.log(request, response, timing, metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.timing.view_name = get_view_name(
+            view_func, request.method.lower()
+        )
+        request.timing.mark("view")
+
+    def process_template_response(self, request, response):
+        request.timing.mark("render")
+        response.add_post_render_callback(
+            lambda response: request.timing.mark("rendered")
+        )
+        return response
+
+    @staticmethod
+    def log(request, response, timing, metrics):
+        duplicates = timing.get_duplicates(settings.N_PLUS_ONE_THRESHOLD)
+        logger.info(
+            json.dumps(
+                {
+                    "view": timing.view_name,
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "queries": len(timing.queries),
+                    "duplicate_queries": sum(duplicates.values()),
+                    **{
+                        f"{name}_ms": round(value, 2)
+                        for name, value in metrics.items()
+                    },
+                },
+                ensure_ascii=False,
+            )
+        )
+        for sql, count in duplicates.items():
+            logger.warning(
+                "Возможный N+1 в %s: %s одинаковых запросов: %s",
+                timing.view_name or request.path,
+                count,
+                sql,
+            )
@@ -1,6 +1,70 @@
-from rest_framework.pagination import PageNumberPagination
+from collections import OrderedDict
+
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+from api.services.queryset_helper import estimate_count
 
 
 class PageSizeLimitPagination(PageNumberPagination):
     """Пагинатор с лимитом."""
     page_size_query_param = 'limit'
+
+
+class IdCursorPagination(CursorPagination):
+    """Курсорный пагинатор по убыванию id без подсчёта строк.
+
+    Параметр count=exact|estimate добавляет в ответ точное или
+    оценочное количество объектов.
+    """
+    ordering = '-id'
+    page_size_query_param = 'limit'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        count_mode = request.query_params.get(self.count_query_param)
+        self.count = None
+        if count_mode == 'exact':
+            self.count = queryset.count()
+        elif count_mode == 'estimate':
+            self.count = estimate_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = OrderedDict((
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ))
+        if self.count is not None:
+            response['count'] = self.count
+            response.move_to_end('count', last=False)
+        return Response(response)
+
+
+class FeedCursorPagination(IdCursorPagination):
+    """Курсорный пагинатор ленты: число записей не считается."""
+    count_query_param = None
+
+
+class PageOrCursorPagination(PageSizeLimitPagination):
+    """Пагинатор по страницам или, при cursor/pagination=cursor, по курсору."""
+    cursor_pagination_class = IdCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if (
+            self.cursor_pagination_class.cursor_query_param
+            in request.query_params
+            or request.query_params.get('pagination') == 'cursor'
+        ):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,35 @@
+from django.http.multipartparser import MultiPartParserError
+from django.utils.datastructures import MultiValueDict
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import DataAndFiles, FileUploadParser
+
+
+class RawImageParser(FileUploadParser):
+    """Изображение в теле запроса без JSON и multipart-обёртки.
+
+    Файл попадает в поле raw_image_field представления.
+    """
+
+    media_type = "image/*"
+
+    def get_filename(self, stream, media_type, parser_context):
+        filename = super().get_filename(stream, media_type, parser_context)
+        if filename:
+            return filename
+        return "upload." + media_type.split(";")[0].split("/")[-1]
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        field = getattr(
+            parser_context["view"], "raw_image_field", "image"
+        )
+        try:
+            result = super().parse(stream, media_type, parser_context)
+        except MultiPartParserError as exc:
+            raise ParseError(str(exc))
+        upload = result.files["file"]
+        # Как DRF для форм: Django закроет файлы запроса после ответа,
+        # иначе временный файл удаляется уже перемещённым сборщиком мусора.
+        parser_context["request"]._request._files = MultiValueDict(
+            {field: [upload]}
+        )
+        return DataAndFiles({}, {field: upload})
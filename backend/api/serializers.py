@@ -1,13 +1,33 @@
 from djoser.serializers import UserCreateSerializer, UserSerializer
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.http import QueryDict
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from rest_framework.validators import UniqueTogetherValidator
 
 from api.services.fields import Base64ImageField
+from api.services.fragment_cache import (
+    get_fragment_keys,
+    get_fragments,
+    set_fragments,
+)
+from api.services.images import get_derivative_urls
+from api.services.queryset_helper import (
+    RECIPE_PREFETCH,
+    get_recipes_limit,
+    get_recipes_queryset,
+    get_subscriptions_queryset,
+)
+from api.services.shopping_list import (
+    change_recipe_in_shopping_lists,
+    lock_recipes,
+)
 from api.services.serializer_helper import (
-    add_ingredients,
     check_subscribe,
     check_recipe,
+    parse_recipe_form,
+    set_ingredients,
 )
 from recipes.models import (
     User,
@@ -19,7 +39,12 @@ from recipes.models import (
     Favorite,
     ShoppingCart,
 )
-from api.services.constants import MIN_VALUE, MAX_VALUE, ERROR_MESSAGES
+from api.services.constants import (
+    BATCH_MAX_SIZE,
+    MIN_VALUE,
+    MAX_VALUE,
+    ERROR_MESSAGES,
+)
 
 
 class UserSignUpSerializer(UserCreateSerializer):
@@ -41,6 +66,7 @@ class UserGetSerializer(UserSerializer):
     """Сериализатор получения информации о пользователе."""
 
     is_subscribed = serializers.SerializerMethodField()
+    avatar_derivatives = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -52,11 +78,19 @@ class UserGetSerializer(UserSerializer):
             "last_name",
             "is_subscribed",
             "avatar",
+            "avatar_derivatives",
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
         return check_subscribe(self.context.get("request"), obj)
 
+    def get_avatar_derivatives(self, obj):
+        return get_derivative_urls(
+            obj.avatar, obj.avatar_hash, self.context.get("request")
+        )
+
 
 class AvatarSerializer(serializers.ModelSerializer):
     """Сериализатор для аватара пользователя."""
@@ -67,6 +101,15 @@ class AvatarSerializer(serializers.ModelSerializer):
         fields = ('avatar',)
 
 
+class RecipeImageSerializer(serializers.ModelSerializer):
+    """Сериализатор изображения рецепта."""
+    image = Base64ImageField(required=True, allow_null=False)
+
+    class Meta:
+        model = Recipe
+        fields = ('image',)
+
+
 class UserSubscribeSerializer(serializers.ModelSerializer):
     """Сериализатор подписки."""
 
@@ -89,8 +132,11 @@ class UserSubscribeSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         request = self.context.get("request")
+        author = get_subscriptions_queryset(
+            request.user, get_recipes_limit(request)
+        ).get(pk=instance.author_id)
         return UserSubscribeRepresentSerializer(
-            instance.author, context={"request": request}
+            author, context={"request": request}
         ).data
 
 
@@ -99,7 +145,7 @@ class UserSubscribeRepresentSerializer(UserGetSerializer):
 
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
@@ -127,19 +173,17 @@ class UserSubscribeRepresentSerializer(UserGetSerializer):
 
     def get_recipes(self, obj):
         request = self.context.get("request")
-        recipes_limit = None
-        if request:
-            recipes_limit = request.query_params.get("recipes_limit")
-        recipes = obj.recipes.all()
-        if recipes_limit:
-            recipes = obj.recipes.all()[: int(recipes_limit)]
+        if hasattr(obj, "limited_recipes"):
+            recipes = obj.limited_recipes
+        else:
+            recipes = obj.recipes.all()
+            recipes_limit = get_recipes_limit(request) if request else None
+            if recipes_limit is not None:
+                recipes = recipes[:recipes_limit]
         return RecipeShortSerializer(
             recipes, many=True, context={"request": request}
         ).data
 
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
-
 
 class TagGetSerializer(serializers.ModelSerializer):
     """Сериализатор получения информации о тегах."""
@@ -175,8 +219,20 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "measurement_unit", "amount")
 
 
+class RecipeListSerializer(serializers.ListSerializer):
+    """Список рецептов одним обращением к кэшу фрагментов."""
+
+    def to_representation(self, data):
+        recipes = data.all() if hasattr(data, "all") else data
+        return self.child.represent_many(list(recipes))
+
+
 class RecipeGetSerializer(serializers.ModelSerializer):
-    """Сериализатор получения информации о рецептах."""
+    """Сериализатор получения информации о рецептах.
+
+    Общая для всех пользователей часть рецепта кэшируется, флаги
+    пользователя накладываются при каждом ответе.
+    """
 
     tags = TagGetSerializer(
         many=True,
@@ -196,11 +252,13 @@ class RecipeGetSerializer(serializers.ModelSerializer):
     is_in_shopping_cart = serializers.SerializerMethodField(
         read_only=True,
     )
+    image_derivatives = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
-        fields = "__all__"
+        exclude = ("image_hash", "tags_mask")
         extra_fields = ("is_favorited", "is_in_shopping_cart")
+        list_serializer_class = RecipeListSerializer
 
     def get_is_favorited(self, obj):
         """Проверить наличие рецепта в избранном."""
@@ -212,6 +270,52 @@ class RecipeGetSerializer(serializers.ModelSerializer):
         request = self.context.get("request")
         return check_recipe(request, obj, ShoppingCart)
 
+    def get_image_derivatives(self, obj):
+        return get_derivative_urls(
+            obj.image, obj.image_hash, self.context.get("request")
+        )
+
+    def to_representation(self, instance):
+        return self.represent_many([instance])[0]
+
+    def represent_many(self, recipes):
+        """Фрагменты из кэша, сборка только промахов и флаги пользователя."""
+        request = self.context.get("request")
+        keys = get_fragment_keys([recipe.id for recipe in recipes], request)
+        fragments = get_fragments(keys)
+        misses = [recipe for recipe in recipes if recipe.id not in fragments]
+        if misses:
+            prefetch_related_objects(misses, *RECIPE_PREFETCH)
+            for recipe in misses:
+                # Флаг подписки накладывается в overlay.
+                recipe.author.is_subscribed = False
+            built = {
+                recipe.id: super(RecipeGetSerializer, self).to_representation(
+                    recipe
+                )
+                for recipe in misses
+            }
+            set_fragments(keys, built)
+            fragments.update(built)
+        return [
+            self.overlay(fragments[recipe.id], recipe) for recipe in recipes
+        ]
+
+    def overlay(self, fragment, recipe):
+        """Наложить на фрагмент флаги пользователя и счётчики рецепта."""
+        data = fragment.copy()
+        data["is_favorited"] = self.get_is_favorited(recipe)
+        data["is_in_shopping_cart"] = self.get_is_in_shopping_cart(recipe)
+        data["favorites_count"] = recipe.favorites_count
+        data["cart_count"] = recipe.cart_count
+        data["author"] = {
+            **data["author"],
+            "is_subscribed": check_subscribe(
+                self.context.get("request"), recipe.author
+            ),
+        }
+        return data
+
 
 class IngredientPostSerializer(serializers.ModelSerializer):
     """Сериализатор добавления ингредиентов в рецепт."""
@@ -255,25 +359,25 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
             "cooking_time",
         )
 
+    def to_internal_value(self, data):
+        if isinstance(data, QueryDict):
+            data = parse_recipe_form(data)
+        return super().to_internal_value(data)
+
     def validate(self, data):
-        if not self.initial_data.get("ingredients"):
+        if not data.get("recipe_ingredients"):
             raise ValidationError(ERROR_MESSAGES["missing_ingredients"])
-        if not self.initial_data.get("tags"):
+        if not data.get("tags"):
             raise ValidationError(ERROR_MESSAGES["missing_tags"])
         return data
 
     def validate_ingredients(self, ingredients):
-        ingredients_list = []
-        for item in ingredients:
-            try:
-                ingredient = Ingredient.objects.get(id=item["id"])
-            except Ingredient.DoesNotExist:
-                raise ValidationError(ERROR_MESSAGES["ingredient_not_found"])
-
-            if ingredient in ingredients_list:
-                raise ValidationError(ERROR_MESSAGES["duplicate_ingredient"])
-
-            ingredients_list.append(ingredient)
+        ingredient_ids = [item["id"] for item in ingredients]
+        unique_ids = set(ingredient_ids)
+        if len(unique_ids) != len(ingredient_ids):
+            raise ValidationError(ERROR_MESSAGES["duplicate_ingredient"])
+        if len(Ingredient.objects.in_bulk(unique_ids)) != len(unique_ids):
+            raise ValidationError(ERROR_MESSAGES["ingredient_not_found"])
         return ingredients
 
     def validate_tags(self, tags):
@@ -281,6 +385,7 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
             raise ValidationError(ERROR_MESSAGES["duplicate_tags"])
         return tags
 
+    @transaction.atomic
     def create(self, validated_data):
         """Создание рецепта с правильными ID ингредиентов."""
         request = self.context.get("request")
@@ -304,33 +409,46 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
 
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop("recipe_ingredients")
         tags = validated_data.pop("tags")
-        instance.tags.clear()
+        lock_recipes([instance.pk])
         instance.tags.set(tags)
-        RecipeIngredient.objects.filter(recipe=instance).delete()
+        old_amounts = set_ingredients(ingredients, instance)
         super().update(instance, validated_data)
-        add_ingredients(ingredients, instance)
-        instance.save()
+        change_recipe_in_shopping_lists(
+            instance,
+            old_amounts,
+            {item["id"]: item["amount"] for item in ingredients},
+        )
         return instance
 
     def to_representation(self, instance):
+        instance = get_recipes_queryset().get(pk=instance.pk)
         return RecipeGetSerializer(instance, context=self.context).data
 
 
 class RecipeShortSerializer(serializers.ModelSerializer):
     """Сериализатор краткой информации о рецепте."""
 
+    image_derivatives = serializers.SerializerMethodField()
+
     class Meta:
         model = Recipe
         fields = (
             "id",
             "name",
             "image",
+            "image_derivatives",
             "cooking_time",
         )
 
+    def get_image_derivatives(self, obj):
+        return get_derivative_urls(
+            obj.image, obj.image_hash, self.context.get("request")
+        )
+
 
 class FavoriteSerializer(serializers.ModelSerializer):
     """Сериализатор избранных рецептов."""
@@ -366,3 +484,25 @@ class ShoppingCartSerializer(FavoriteSerializer):
                 message=ERROR_MESSAGES["duplicate_shopping"],
             )
         ]
+
+
+class BatchSerializer(serializers.Serializer):
+    """Сериализатор id для добавления и удаления пачкой."""
+
+    add = serializers.ListField(
+        child=serializers.IntegerField(min_value=MIN_VALUE),
+        max_length=BATCH_MAX_SIZE,
+        default=list,
+    )
+    remove = serializers.ListField(
+        child=serializers.IntegerField(min_value=MIN_VALUE),
+        max_length=BATCH_MAX_SIZE,
+        default=list,
+    )
+
+    def validate(self, data):
+        if not data["add"] and not data["remove"]:
+            raise ValidationError(ERROR_MESSAGES["empty_batch"])
+        if set(data["add"]) & set(data["remove"]):
+            raise ValidationError(ERROR_MESSAGES["batch_conflict"])
+        return data
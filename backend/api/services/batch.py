@@ -0,0 +1,126 @@
+from django.db import IntegrityError, connection, transaction
+from django.dispatch import Signal
+
+from api.services.shopping_list import lock_recipes
+from recipes.models import Favorite, Recipe, ShoppingCart, Subscribe, User
+
+# Связь пользователя → модель объекта и поле ссылки на него.
+BATCH_RELATIONS = {
+    Favorite: (Recipe, "recipe"),
+    ShoppingCart: (Recipe, "recipe"),
+    Subscribe: (User, "author"),
+}
+
+# Связи пользователя добавлены или удалены: sender — модель связи,
+# user_id, added и removed — id рецептов или авторов. Одиночные записи
+# отправляют его из post_save и post_delete, пачки — один раз из
+# apply_batch, поэтому обработчики связей подключаются только к нему.
+relations_changed = Signal()
+
+
+def get_relation_target(instance):
+    """Id рецепта или автора связи."""
+    _, field = BATCH_RELATIONS[type(instance)]
+    return getattr(instance, f"{field}_id")
+
+
+def get_statuses(user, model, add, remove, found, existing):
+    """Статус каждого id: что с ним будет сделано или почему нет."""
+    statuses = {}
+    for item_id in add:
+        if item_id not in found:
+            statuses[item_id] = "not_found"
+        elif model is Subscribe and item_id == user.id:
+            statuses[item_id] = "invalid"
+        elif item_id in existing:
+            statuses[item_id] = "exists"
+        else:
+            statuses[item_id] = "added"
+    for item_id in remove:
+        if item_id not in found:
+            statuses[item_id] = "not_found"
+        elif item_id in existing:
+            statuses[item_id] = "removed"
+        else:
+            statuses[item_id] = "absent"
+    return statuses
+
+
+def delete_rows(model, pks):
+    """Удалить строки одним DELETE без post_delete, вернуть их число.
+
+    Обработчики связей получают вместо этого один relations_changed.
+    """
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {quote(model._meta.db_table)} "
+            f"WHERE {quote(model._meta.pk.column)} "
+            f"IN ({', '.join(['%s'] * len(pks))})",
+            pks,
+        )
+        return cursor.rowcount
+
+
+def apply_batch(user, model, add=(), remove=()):
+    """Добавить связи пользователя с объектами add и удалить с remove.
+
+    Строка пользователя блокируется, как в apply_shopping_list_deltas,
+    поэтому пачки одного пользователя выполняются по очереди, а текущие
+    связи читаются с блокировкой строк. Вставка без ignore_conflicts:
+    если связь успела добавить одиночная запись, пачка перечитывает
+    связи и повторяет вставку, так что счётчики и список покупок
+    меняются только для действительно вставленных и удалённых строк.
+    """
+    target, field = BATCH_RELATIONS[model]
+    lookup = f"{field}_id__in"
+    add, remove = list(dict.fromkeys(add)), list(dict.fromkeys(remove))
+    requested = {*add, *remove}
+    found = set(
+        target.objects.filter(id__in=requested).values_list("id", flat=True)
+    )
+    with transaction.atomic():
+        if model is ShoppingCart:
+            # Порядок блокировок как у одиночной корзины: рецепты, затем
+            # пользователь.
+            lock_recipes(found)
+        list(
+            User.objects.select_for_update()
+            .filter(id=user.id)
+            .values_list("id", flat=True)
+        )
+        for attempt in range(2):
+            existing = dict(
+                model.objects.select_for_update()
+                .filter(user=user, **{lookup: requested})
+                .values_list(f"{field}_id", "pk")
+            )
+            statuses = get_statuses(
+                user, model, add, remove, found, existing
+            )
+            added = [
+                item_id for item_id in add if statuses[item_id] == "added"
+            ]
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_create(
+                        model(user=user, **{f"{field}_id": item_id})
+                        for item_id in added
+                    )
+                break
+            except IntegrityError:
+                if attempt:
+                    raise
+        removed = [
+            item_id for item_id in remove if statuses[item_id] == "removed"
+        ]
+        if removed:
+            delete_rows(model, [existing[item_id] for item_id in removed])
+        if added or removed:
+            relations_changed.send(
+                model, user_id=user.id, added=added, removed=removed
+            )
+    return [
+        {"id": item_id, "status": statuses[item_id]}
+        for item_id in (*add, *remove)
+    ]
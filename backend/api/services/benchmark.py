@@ -0,0 +1,154 @@
+import math
+import random
+from urllib.parse import quote
+
+from django.db.models import Count
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient, User
+
+# Имя, метод, путь и вес в смешанной нагрузке. Метод TOGGLE означает
+# пару запросов POST и DELETE, возвращающую данные в исходное состояние.
+ENDPOINTS = (
+    ("recipes.list", "GET", "/api/recipes/", 30),
+    ("recipes.list.deep", "GET", "/api/recipes/?page={deep_page}", 3),
+    (
+        "recipes.list.tags",
+        "GET",
+        "/api/recipes/?tags=breakfast&tags=lunch",
+        10,
+    ),
+    ("recipes.list.author", "GET", "/api/recipes/?author={author_id}", 5),
+    ("recipes.list.favorited", "GET", "/api/recipes/?is_favorited=1", 5),
+    ("recipes.list.cart", "GET", "/api/recipes/?is_in_shopping_cart=1", 3),
+    ("recipes.list.cursor", "GET", "/api/recipes/?pagination=cursor", 5),
+    ("recipes.feed", "GET", "/api/recipes/feed/", 5),
+    ("recipes.search", "GET", "/api/recipes/?search={word}", 5),
+    (
+        "recipes.pantry",
+        "GET",
+        "/api/recipes/?has_ingredients={pantry}&max_missing=2",
+        3,
+    ),
+    ("recipes.detail", "GET", "/api/recipes/{recipe_id}/", 20),
+    ("recipes.favorite", "TOGGLE", "/api/recipes/{recipe_id}/favorite/", 5),
+    (
+        "recipes.shopping_cart",
+        "TOGGLE",
+        "/api/recipes/{recipe_id}/shopping_cart/",
+        5,
+    ),
+    ("recipes.download.txt", "GET", "/api/recipes/download_shopping_cart/", 1),
+    (
+        "recipes.download.csv",
+        "GET",
+        "/api/recipes/download_shopping_cart/?format=csv",
+        1,
+    ),
+    (
+        "recipes.download.pdf",
+        "GET",
+        "/api/recipes/download_shopping_cart/?format=pdf",
+        1,
+    ),
+    ("ingredients.search", "GET", "/api/ingredients/?name={prefix}", 10),
+    ("ingredients.list", "GET", "/api/ingredients/", 1),
+    ("tags.list", "GET", "/api/tags/", 3),
+    ("users.me", "GET", "/api/users/me/", 3),
+    ("users.list", "GET", "/api/users/", 1),
+    (
+        "users.subscriptions",
+        "GET",
+        "/api/users/subscriptions/?recipes_limit=3",
+        4,
+    ),
+    ("users.subscribe", "TOGGLE", "/api/users/{author_id}/subscribe/", 2),
+)
+
+
+# Верхние границы корзин гистограммы задержек, мс.
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def histogram(latencies):
+    """Число запросов в каждой корзине задержек, последняя без границы."""
+    counts = dict.fromkeys([*map(str, LATENCY_BUCKETS), "inf"], 0)
+    for latency in latencies:
+        bucket = next(
+            (str(bound) for bound in LATENCY_BUCKETS if latency <= bound),
+            "inf",
+        )
+        counts[bucket] += 1
+    return counts
+
+
+def percentile(sorted_values, fraction):
+    """Перцентиль по методу ближайшего ранга."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies):
+    """Сводка задержек в миллисекундах."""
+    values = sorted(latencies)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 3),
+        "p50": round(percentile(values, 0.5), 3),
+        "p90": round(percentile(values, 0.9), 3),
+        "p95": round(percentile(values, 0.95), 3),
+        "p99": round(percentile(values, 0.99), 3),
+        "max": round(values[-1], 3),
+    }
+
+
+def get_bench_user(email=None):
+    """Пользователь для замеров: заданный или с самой большой корзиной."""
+    users = User.objects.all()
+    if email:
+        return users.get(email=email)
+    return (
+        users.annotate(cart_size=Count("carts"))
+        .filter(cart_size__gt=0)
+        .order_by("-cart_size", "id")
+        .first()
+    )
+
+
+def get_bench_params(user, rng=random):
+    """Значения для подстановки в пути ENDPOINTS."""
+    recipe_ids = list(
+        Recipe.objects.exclude(favorites__user=user)
+        .exclude(carts__user=user)
+        .values_list("id", flat=True)[:100]
+    )
+    author_ids = list(
+        User.objects.exclude(id=user.id)
+        .exclude(following__user=user)
+        .filter(recipes__isnull=False)
+        .values_list("id", flat=True)[:100]
+    )
+    ingredient = Ingredient.objects.order_by("?").first()
+    recipe_id = rng.choice(recipe_ids) if recipe_ids else 0
+    recipe_name = (
+        Recipe.objects.filter(id=recipe_id)
+        .values_list("name", flat=True)
+        .first()
+    )
+    # Набор продуктов: почти весь состав рецепта, чтобы совпадения были.
+    pantry = list(
+        RecipeIngredient.objects.filter(recipe_id=recipe_id)
+        .order_by("id")
+        .values_list("ingredient_id", flat=True)[1:6]
+    )
+    return {
+        "recipe_id": recipe_id,
+        "author_id": rng.choice(author_ids) if author_ids else 0,
+        "deep_page": max(Recipe.objects.count() // 12, 1),
+        "prefix": quote(ingredient.name[:2] if ingredient else "а"),
+        "word": quote(max((recipe_name or "суп").split(), key=len)),
+        "pantry": ",".join(map(str, pantry or [0])),
+    }
@@ -0,0 +1,64 @@
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.memcached import BaseMemcachedCache
+
+VERSION_CACHE_ALIAS = "versions"
+
+
+def is_shared_cache(backend):
+    """Кэш общий для всех процессов, add и incr в нём атомарны.
+
+    Это memcached и Redis. LocMemCache у каждого процесса свой, а в
+    FileBasedCache и DatabaseCache add и incr — чтение и запись.
+    """
+    return isinstance(backend, BaseMemcachedCache) or (
+        "redis" in type(backend).__module__
+    )
+
+
+def get_version_cache():
+    """Общий кэш версий, отдельный от вытесняемых данных."""
+    return caches[VERSION_CACHE_ALIAS]
+
+
+def get_version(key):
+    """Текущая версия данных из общего кэша.
+
+    Отсутствующий или вытесненный ключ создаётся с новой версией, поэтому
+    его потеря заставляет процессы пересобрать данные, а не считать
+    устаревшие свежими.
+    """
+    return get_versions([key])[key]
+
+
+def get_versions(keys):
+    """Текущие версии нескольких ключей, отсутствующие создаются.
+
+    Ключ, вытесненный из переполненного кэша сразу после создания,
+    получает новую версию: зависящие от него записи просто промахнутся.
+    """
+    cache = get_version_cache()
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        version = time.time_ns()
+        for key in missing:
+            cache.add(key, version, timeout=None)
+        created = cache.get_many(missing)
+        versions.update({key: created.get(key, version) for key in missing})
+    return versions
+
+
+def bump_version(key):
+    """Сменить версию данных во всех процессах."""
+    version = time.time_ns()
+    get_version_cache().set(key, version, timeout=None)
+    return version
+
+
+def bump_versions(keys):
+    """Сменить версии нескольких ключей во всех процессах."""
+    get_version_cache().set_many(
+        dict.fromkeys(keys, time.time_ns()), timeout=None
+    )
@@ -0,0 +1,86 @@
+import gzip
+import hashlib
+import threading
+from collections import namedtuple
+
+from rest_framework.renderers import JSONRenderer
+
+from api.services.cache_helper import bump_version, get_version
+from api.services.deferred import collect_on_commit
+from recipes.models import Ingredient, Tag
+
+CATALOG_VERSION_KEY = "catalog:version"
+
+CatalogSnapshot = namedtuple(
+    "CatalogSnapshot", ("body", "gzip_body", "etag", "gzip_etag")
+)
+
+
+def get_catalog_version():
+    """Текущая версия справочников тегов и ингредиентов."""
+    return get_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    """Отметить изменение справочников во всех процессах."""
+    return bump_version(CATALOG_VERSION_KEY)
+
+
+def flush_catalog_version(keys):
+    bump_catalog_version()
+
+
+def schedule_catalog_version_bump():
+    """Сменить версию после фиксации транзакции.
+
+    Иначе другой процесс успеет пересобрать снимок по старым строкам и
+    отдавать его под новой версией до следующей правки.
+    """
+    collect_on_commit(flush_catalog_version, [CATALOG_VERSION_KEY])
+
+
+def get_catalogs():
+    """Справочники: модель и сериализатор полного списка."""
+    from api.serializers import IngredientSerializer, TagGetSerializer
+
+    return {
+        "tags": (Tag, TagGetSerializer),
+        "ingredients": (Ingredient, IngredientSerializer),
+    }
+
+
+class CatalogSnapshots:
+    """Готовые JSON-ответы справочников для текущей версии."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._snapshots = {}
+
+    @staticmethod
+    def _build(name):
+        model, serializer_class = get_catalogs()[name]
+        body = JSONRenderer().render(
+            serializer_class(model.objects.all(), many=True).data
+        )
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        return CatalogSnapshot(
+            body=body,
+            gzip_body=gzip.compress(body, mtime=0),
+            etag=f'"{name}-{digest}"',
+            gzip_etag=f'"{name}-{digest}-gzip"',
+        )
+
+    def get(self, name):
+        """Снимок справочника name, при необходимости пересобранный."""
+        version = get_catalog_version()
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._snapshots = {}
+            if name not in self._snapshots:
+                self._snapshots[name] = self._build(name)
+            return self._snapshots[name]
+
+
+catalog_snapshots = CatalogSnapshots()
@@ -1,5 +1,14 @@
 MIN_VALUE = 1
 MAX_VALUE = 100000
+EXPORT_CHUNK_SIZE = 500
+BATCH_MAX_SIZE = 100
+
+IMAGE_SIGNATURES = (
+    b"\xff\xd8\xff",
+    b"\x89PNG\r\n\x1a\n",
+    b"GIF87a",
+    b"GIF89a",
+)
 
 ERROR_MESSAGES = {
     "duplicate_ingredient": "Ингредиенты должны быть уникальными!",
@@ -11,4 +20,8 @@ ERROR_MESSAGES = {
     "duplicate_favorite": "Рецепт уже находится в избранном.",
     "duplicate_shopping": "Рецепт уже добавлен в список покупок.",
     "ingredient_not_found": "Указан несуществующий ингредиент.",
+    "invalid_image": "Некорректный формат изображения.",
+    "image_too_large": "Размер изображения превышает допустимый.",
+    "empty_batch": "Укажите id для добавления или удаления.",
+    "batch_conflict": "Один id нельзя одновременно добавить и удалить.",
 }
@@ -0,0 +1,71 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorite, Recipe, ShoppingCart, User
+
+# Связь → модель со счётчиком, поле ссылки и поле счётчика.
+COUNTERS = {
+    Favorite: (Recipe, "recipe", "favorites_count"),
+    ShoppingCart: (Recipe, "recipe", "cart_count"),
+    Recipe: (User, "author", "recipes_count"),
+}
+
+
+def change_counters(related, ids, delta):
+    """Изменить счётчики записей ids одним UPDATE с F().
+
+    related — модель связи из COUNTERS, например Favorite.
+    """
+    model, _, counter = COUNTERS[related]
+    queryset = model.objects.filter(pk__in=ids)
+    if delta < 0:
+        queryset = queryset.filter(**{f"{counter}__gte": -delta})
+    queryset.update(**{counter: F(counter) + delta})
+
+
+def change_counter(instance, delta):
+    """Изменить счётчик связанной записи."""
+    _, field, _ = COUNTERS[type(instance)]
+    change_counters(type(instance), [getattr(instance, f"{field}_id")], delta)
+
+
+def count_related(model, field):
+    """Фактическое число связанных записей для аннотации."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def recount(model, ids, fix=True):
+    """Сверить хранимые счётчики записей ids и вернуть число расхождений."""
+    expressions = {
+        counter: count_related(related, field)
+        for related, (counted, field, counter) in COUNTERS.items()
+        if counted is model
+    }
+    rows = model.objects.filter(id__in=ids).annotate(
+        **{
+            f"actual_{counter}": expression
+            for counter, expression in expressions.items()
+        }
+    )
+    drifted = []
+    for row in rows:
+        changed = False
+        for counter in expressions:
+            actual = getattr(row, f"actual_{counter}")
+            if getattr(row, counter) != actual:
+                setattr(row, counter, actual)
+                changed = True
+        if changed:
+            drifted.append(row)
+    if fix and drifted:
+        model.objects.bulk_update(drifted, list(expressions))
+    return len(drifted)
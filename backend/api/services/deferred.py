@@ -0,0 +1,23 @@
+import threading
+
+from django.db import transaction
+
+# Значения, накопленные до фиксации транзакции: {обработчик: множество}.
+_pending = threading.local()
+
+
+def collect_on_commit(handler, values):
+    """Вызвать handler один раз после фиксации со всеми накопленными values.
+
+    Правка многих строк в одной транзакции стоит одного вызова handler,
+    а не вызова на строку. Вне транзакции handler вызывается сразу.
+    """
+    batches = _pending.__dict__.setdefault("batches", {})
+    batches.setdefault(handler, set()).update(values)
+    transaction.on_commit(lambda: flush(handler))
+
+
+def flush(handler):
+    values = _pending.__dict__.get("batches", {}).pop(handler, None)
+    if values:
+        handler(values)
@@ -0,0 +1,94 @@
+import csv
+import io
+from functools import lru_cache
+from itertools import chain
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+PDF_FONT_NAME = "ShoppingListFont"
+PDF_MARGIN = 50
+PDF_FONT_SIZE = 12
+PDF_LEADING = 16
+PDF_LINES_PER_PAGE = int(A4[1] - 2 * PDF_MARGIN) // PDF_LEADING
+
+
+def get_title(user):
+    return f"Список покупок пользователя {user}:"
+
+
+def iter_txt(user, rows):
+    """Список покупок в текстовом формате."""
+    yield get_title(user) + "\n"
+    for name, unit, amount in rows:
+        yield f"\n{name} - {amount}/{unit}"
+
+
+class Echo:
+    """Буфер для csv.writer, возвращающий записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(user, rows):
+    """Список покупок в формате CSV."""
+    writer = csv.writer(Echo())
+    yield "\ufeff" + writer.writerow(
+        ("Ингредиент", "Количество", "Единица измерения")
+    )
+    for name, unit, amount in rows:
+        yield writer.writerow((name, amount, unit))
+
+
+@lru_cache(maxsize=None)
+def register_pdf_font(path):
+    """Зарегистрировать шрифт TrueType с кириллицей из PDF_FONT_PATH.
+
+    reportlab встраивает в файл только использованные глифы.
+    """
+    if not Path(path).is_file():
+        raise ImproperlyConfigured(
+            f"PDF_FONT_PATH: файл шрифта {path} не найден."
+        )
+    pdfmetrics.registerFont(TTFont(PDF_FONT_NAME, path))
+    return PDF_FONT_NAME
+
+
+def iter_pdf(user, rows):
+    """Список покупок в формате PDF.
+
+    Файл собирается целиком: PDF нельзя отдавать частями до таблицы
+    перекрёстных ссылок в конце.
+    """
+    font = register_pdf_font(settings.PDF_FONT_PATH)
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4, pageCompression=1)
+    lines = chain(
+        (get_title(user), ""),
+        (f"{name} - {amount}/{unit}" for name, unit, amount in rows),
+    )
+    text = None
+    for number, line in enumerate(lines):
+        if number % PDF_LINES_PER_PAGE == 0:
+            if text is not None:
+                pdf.drawText(text)
+                pdf.showPage()
+            text = pdf.beginText(PDF_MARGIN, A4[1] - PDF_MARGIN)
+            text.setFont(font, PDF_FONT_SIZE, PDF_LEADING)
+        text.textLine(line)
+    pdf.drawText(text)
+    pdf.save()
+    yield buffer.getvalue()
+
+
+EXPORTERS = {
+    "txt": (iter_txt, "text/plain; charset=utf-8"),
+    "csv": (iter_csv, "text/csv; charset=utf-8"),
+    "pdf": (iter_pdf, "application/pdf"),
+}
@@ -0,0 +1,129 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.expressions import RawSQL
+
+from api.services.queryset_helper import get_recipes_queryset
+from recipes.models import FeedEntry, Recipe, Subscribe, User
+
+# Последние N рецептов каждого автора из подзапроса {authors}.
+LATEST_RECIPES_SQL = f"""
+    SELECT ranked.id FROM (
+        SELECT recipe.id, ROW_NUMBER() OVER (
+            PARTITION BY recipe.author_id ORDER BY recipe.id DESC
+        ) AS row_number
+        FROM {Recipe._meta.db_table} AS recipe
+        WHERE recipe.author_id IN ({{authors}})
+    ) AS ranked
+    WHERE ranked.row_number <= %s
+"""
+
+
+def fan_out_recipe(recipe):
+    """Добавить рецепт в ленты подписчиков автора пачками.
+
+    Автор, у которого подписчиков больше FEED_FANOUT_LIMIT, навсегда
+    переводится на чтение при запросе ленты: его рецепты в ленты не
+    копируются.
+    """
+    if User.objects.filter(pk=recipe.author_id, feed_pull=True).exists():
+        return
+    limit = settings.FEED_FANOUT_LIMIT
+    follower_ids = list(
+        Subscribe.objects.filter(author_id=recipe.author_id)
+        .order_by("id")
+        .values_list("user_id", flat=True)[:limit + 1]
+    )
+    if len(follower_ids) > limit:
+        User.objects.filter(pk=recipe.author_id).update(feed_pull=True)
+        return
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id,
+                recipe_id=recipe.pk,
+                author_id=recipe.author_id,
+            )
+            for user_id in follower_ids
+        ),
+        batch_size=settings.FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def schedule_fan_out(recipe):
+    """Разослать рецепт по лентам после фиксации транзакции."""
+    transaction.on_commit(lambda: fan_out_recipe(recipe))
+
+
+def backfill_feed(user_id, author_ids):
+    """Добавить в ленту последние рецепты новых авторов из подписок."""
+    authors_sql, params = (
+        User.objects.filter(id__in=author_ids, feed_pull=False)
+        .values("id")
+        .query.sql_with_params()
+    )
+    recipes = Recipe.objects.filter(
+        id__in=RawSQL(
+            LATEST_RECIPES_SQL.format(authors=authors_sql),
+            (*params, settings.FEED_BACKFILL_SIZE),
+        )
+    ).values_list("id", "author_id")
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id, recipe_id=recipe_id, author_id=author_id
+            )
+            for recipe_id, author_id in recipes
+        ),
+        batch_size=settings.FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def clear_feed(user_id, author_ids):
+    """Убрать из ленты рецепты авторов, от которых пользователь отписался."""
+    FeedEntry.objects.filter(
+        user_id=user_id, author_id__in=author_ids
+    ).delete()
+
+
+def get_feed_ids(user, position=None, reverse=False, size=None):
+    """Id рецептов ленты до или после position по убыванию id.
+
+    Берёт по size записей из таблицы ленты и из рецептов авторов,
+    которые читаются при запросе, и объединяет их.
+    """
+    entries = FeedEntry.objects.filter(user=user)
+    pulled = Recipe.objects.filter(
+        author_id__in=Subscribe.objects.filter(
+            user=user, author__feed_pull=True
+        ).values("author_id")
+    )
+    if position is not None:
+        lookup = "gt" if reverse else "lt"
+        entries = entries.filter(**{f"recipe_id__{lookup}": position})
+        pulled = pulled.filter(**{f"id__{lookup}": position})
+    sign = "" if reverse else "-"
+    ids = set(
+        entries.order_by(f"{sign}recipe_id")
+        .values_list("recipe_id", flat=True)[:size]
+    )
+    ids.update(
+        pulled.order_by(f"{sign}id").values_list("id", flat=True)[:size]
+    )
+    return sorted(ids, reverse=not reverse)[:size]
+
+
+def get_feed_queryset(user, cursor, size):
+    """Рецепты ленты, среди которых курсорный пагинатор выберет страницу.
+
+    cursor — декодированный курсор IdCursorPagination или None.
+    """
+    position, reverse = None, False
+    if cursor is not None:
+        reverse = cursor.reverse
+        if cursor.position is not None:
+            position = int(cursor.position)
+            size += cursor.offset
+    ids = get_feed_ids(user, position, reverse, size)
+    return get_recipes_queryset().filter(id__in=ids)
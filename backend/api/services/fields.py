@@ -1,21 +1,34 @@
 import base64
 from rest_framework import serializers
+from django.conf import settings
 from django.core.files.base import ContentFile
 
+from api.services.constants import ERROR_MESSAGES
+from api.services.uploads import is_image_header
+
 
 class Base64ImageField(serializers.ImageField):
-    """Кастомное поле для декодирования изображений в формате base64."""
+    """Кастомное поле для декодирования изображений в формате base64.
+
+    Файлы из multipart-формы и тела запроса передаются как есть.
+    """
 
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith("data:image"):
             try:
                 format, imgstr = data.split(";base64,")
                 ext = format.split("/")[-1]
+                if len(imgstr) * 3 // 4 > settings.MAX_IMAGE_UPLOAD_SIZE:
+                    raise serializers.ValidationError(
+                        ERROR_MESSAGES["image_too_large"]
+                    )
+                if not is_image_header(base64.b64decode(imgstr[:16])):
+                    raise ValueError
                 data = ContentFile(
                     base64.b64decode(imgstr), name="temp." + ext
                 )
             except (ValueError, TypeError):
                 raise serializers.ValidationError(
-                    "Некорректный формат изображения."
+                    ERROR_MESSAGES["invalid_image"]
                 )
         return super().to_internal_value(data)
@@ -0,0 +1,37 @@
+from django.core.cache import caches
+
+from api.services.cache_helper import get_versions
+from api.services.page_cache import ALL_KEY, PAGE_CACHE_ALIAS, recipe_key
+
+
+def get_fragment_keys(recipe_ids, request=None):
+    """Ключи фрагментов рецептов с текущими поколениями страниц.
+
+    Поколение рецепта меняется при правке рецепта и данных автора,
+    поэтому устаревший фрагмент просто перестаёт находиться.
+    """
+    versions = get_versions([ALL_KEY, *map(recipe_key, recipe_ids)])
+    host = request.get_host() if request else ""
+    return {
+        recipe_id: (
+            f"fragment:recipe:{host}:{recipe_id}:"
+            f"{versions[ALL_KEY]}:{versions[recipe_key(recipe_id)]}"
+        )
+        for recipe_id in recipe_ids
+    }
+
+
+def get_fragments(keys):
+    """Найденные фрагменты: {id рецепта: данные}."""
+    found = caches[PAGE_CACHE_ALIAS].get_many(keys.values())
+    return {
+        recipe_id: found[key]
+        for recipe_id, key in keys.items()
+        if key in found
+    }
+
+
+def set_fragments(keys, fragments):
+    caches[PAGE_CACHE_ALIAS].set_many(
+        {keys[recipe_id]: data for recipe_id, data in fragments.items()}
+    )
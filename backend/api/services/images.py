@@ -0,0 +1,77 @@
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+DERIVATIVES_DIR = "derivatives"
+DERIVATIVE_SIZES = {
+    "thumb": 100,
+    "card": 480,
+    "full": 1200,
+}
+DERIVATIVE_FORMATS = {
+    "webp": "WEBP",
+    "jpeg": "JPEG",
+}
+DERIVATIVE_QUALITY = 82
+
+
+def get_derivative_name(digest, size, extension):
+    """Путь производного изображения, однозначно задаваемый содержимым."""
+    return f"{DERIVATIVES_DIR}/{digest[:2]}/{digest}/{size}.{extension}"
+
+
+def open_rgb(content):
+    image = ImageOps.exif_transpose(Image.open(BytesIO(content)))
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def build_derivatives(field_file):
+    """Создать уменьшенные копии изображения и вернуть хеш содержимого.
+
+    Файлы с таким хешем уже в хранилище не перезаписываются.
+    """
+    storage = field_file.storage
+    with field_file.open("rb") as file:
+        content = file.read()
+    digest = hashlib.sha256(content).hexdigest()[:32]
+    try:
+        image = open_rgb(content)
+    except (OSError, UnidentifiedImageError):
+        return ""
+    for size, max_side in DERIVATIVE_SIZES.items():
+        derivative = image.copy()
+        derivative.thumbnail((max_side, max_side), Image.LANCZOS)
+        for extension, image_format in DERIVATIVE_FORMATS.items():
+            name = get_derivative_name(digest, size, extension)
+            if storage.exists(name):
+                continue
+            buffer = BytesIO()
+            derivative.save(
+                buffer, image_format, quality=DERIVATIVE_QUALITY
+            )
+            storage.save(name, ContentFile(buffer.getvalue()))
+    return digest
+
+
+def get_derivative_urls(field_file, digest, request=None):
+    """Ссылки на производные изображения: {размер: {формат: url}}."""
+    if not digest:
+        return None
+    urls = {}
+    for size in DERIVATIVE_SIZES:
+        urls[size] = {}
+        for extension in DERIVATIVE_FORMATS:
+            url = field_file.storage.url(
+                get_derivative_name(digest, size, extension)
+            )
+            urls[size][extension] = (
+                request.build_absolute_uri(url) if request else url
+            )
+    return urls
@@ -0,0 +1,60 @@
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+
+from api.services.catalog import get_catalog_version
+from recipes.models import Ingredient
+
+
+class IngredientPrefixIndex:
+    """Индекс ингредиентов по префиксу названия в памяти процесса."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._built = False
+        self._version = None
+        self._keys = []
+        self._items = []
+
+    def _build(self, version):
+        """Загрузить ингредиенты, если их не больше max_size."""
+        from api.serializers import IngredientSerializer
+
+        keys, items = [], []
+        if Ingredient.objects.count() <= self.max_size:
+            rows = sorted(
+                IngredientSerializer(Ingredient.objects.all(), many=True).data,
+                key=lambda item: (item["name"].lower(), item["id"]),
+            )
+            keys = [item["name"].lower() for item in rows]
+            items = [dict(item) for item in rows]
+        self._keys, self._items = keys, items
+        self._version = version
+        self._built = True
+
+    def _ensure_fresh(self):
+        version = get_catalog_version()
+        if self._built and self._version == version:
+            return
+        with self._lock:
+            if not self._built or self._version != version:
+                self._build(version)
+
+    def search(self, prefix):
+        """Ингредиенты с названием на prefix или None без индекса."""
+        self._ensure_fresh()
+        keys, items = self._keys, self._items
+        if not keys:
+            return None
+        prefix = prefix.lower()
+        result = []
+        for position in range(bisect_left(keys, prefix), len(keys)):
+            if not keys[position].startswith(prefix):
+                break
+            result.append(items[position])
+        return result
+
+
+ingredient_index = IngredientPrefixIndex(settings.INGREDIENT_INDEX_MAX_SIZE)
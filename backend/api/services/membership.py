@@ -0,0 +1,113 @@
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+
+from api.services.cache_helper import bump_versions, get_versions
+from api.services.deferred import collect_on_commit
+from recipes.models import Favorite, ShoppingCart, Subscribe
+
+# Вид принадлежности: модель и поле с id рецепта или автора.
+MEMBERSHIP_KINDS = {
+    "favorites": (Favorite, "recipe_id"),
+    "carts": (ShoppingCart, "recipe_id"),
+    "follows": (Subscribe, "author_id"),
+}
+MODEL_KINDS = {
+    model: kind for kind, (model, _) in MEMBERSHIP_KINDS.items()
+}
+ARRAY_TYPE = "q"
+
+
+def get_generation_key(user_id, kind):
+    return f"membership:{user_id}:{kind}"
+
+
+def get_membership_key(user_id, kind, version):
+    return f"membership:{user_id}:{kind}:{version}"
+
+
+def load_ids(user_id, kind):
+    """Отсортированный массив id из базы."""
+    model, field = MEMBERSHIP_KINDS[kind]
+    return array(
+        ARRAY_TYPE,
+        model.objects.filter(user_id=user_id)
+        .order_by(field)
+        .values_list(field, flat=True),
+    )
+
+
+class Membership:
+    """Избранное, корзина и подписки пользователя в отсортированных массивах.
+
+    Массивы хранятся в общем кэше под ключом с поколением, проверка
+    принадлежности — бинарный поиск.
+    """
+
+    def __init__(self, arrays):
+        self.arrays = arrays
+
+    @classmethod
+    def load(cls, user_id):
+        """Массивы из кэша, недостающие загружаются из базы и кэшируются.
+
+        Поколение читается до базы: массив, прочитанный до фиксации
+        чужой правки, записывается под прежним поколением и больше не
+        читается.
+        """
+        generations = {
+            kind: get_generation_key(user_id, kind)
+            for kind in MEMBERSHIP_KINDS
+        }
+        versions = get_versions(list(generations.values()))
+        keys = {
+            kind: get_membership_key(user_id, kind, versions[generation])
+            for kind, generation in generations.items()
+        }
+        cached = cache.get_many(keys.values())
+        arrays, missing = {}, {}
+        for kind, key in keys.items():
+            if key in cached:
+                arrays[kind] = array(ARRAY_TYPE)
+                arrays[kind].frombytes(cached[key])
+            else:
+                arrays[kind] = load_ids(user_id, kind)
+                missing[key] = arrays[kind].tobytes()
+        if missing:
+            cache.set_many(missing, timeout=settings.MEMBERSHIP_CACHE_TIMEOUT)
+        return cls(arrays)
+
+    def ids(self, kind):
+        return self.arrays[kind]
+
+    def contains(self, kind, value):
+        values = self.arrays[kind]
+        index = bisect_left(values, value)
+        return index < len(values) and values[index] == value
+
+
+EMPTY_MEMBERSHIP = Membership(
+    {kind: array(ARRAY_TYPE) for kind in MEMBERSHIP_KINDS}
+)
+
+
+def get_membership(user):
+    """Принадлежность пользователя, загружаемая один раз за запрос."""
+    if not user.is_authenticated:
+        return EMPTY_MEMBERSHIP
+    if not hasattr(user, "_membership"):
+        user._membership = Membership.load(user.id)
+    return user._membership
+
+
+def refresh_membership(user_id, model):
+    """Сменить поколение массива после фиксации транзакции.
+
+    Массив перечитается из базы при следующем обращении; правки многих
+    строк в одной транзакции меняют поколения одним запросом к кэшу.
+    """
+    collect_on_commit(
+        bump_versions, [get_generation_key(user_id, MODEL_KINDS[model])]
+    )
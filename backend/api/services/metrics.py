@@ -0,0 +1,73 @@
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+# Под gunicorn значения метрик хранятся в файлах каталога
+# PROMETHEUS_MULTIPROC_DIR и суммируются по всем воркерам.
+VIEW_LABELS = ("viewset", "action", "method")
+
+REQUEST_DURATION = Histogram(
+    "foodgram_http_request_duration_seconds",
+    "Длительность обработки запроса.",
+    VIEW_LABELS,
+)
+REQUESTS = Counter(
+    "foodgram_http_requests",
+    "Обработанные запросы по кодам ответа.",
+    (*VIEW_LABELS, "status"),
+)
+IN_PROGRESS = Gauge(
+    "foodgram_http_requests_in_progress",
+    "Запросы в обработке.",
+    multiprocess_mode="livesum",
+)
+DB_QUERIES = Histogram(
+    "foodgram_db_queries_per_request",
+    "Число SQL-запросов за запрос.",
+    VIEW_LABELS,
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, float("inf")),
+)
+DB_DURATION = Histogram(
+    "foodgram_db_duration_seconds",
+    "Суммарное время SQL за запрос.",
+    VIEW_LABELS,
+)
+WRITES = Counter(
+    "foodgram_writes",
+    "Добавления и удаления избранного, корзин и подписок.",
+    ("model", "operation"),
+)
+
+
+def observe_request(request, response, timing):
+    """Учесть запрос по замерам RequestTimingMiddleware."""
+    viewset, _, action = (timing.view_name or "unmatched").rpartition(".")
+    labels = (viewset or action, action if viewset else "", request.method)
+    REQUEST_DURATION.labels(*labels).observe(
+        timing.marks["done"] - timing.marks["request"]
+    )
+    REQUESTS.labels(*labels, str(response.status_code)).inc()
+    DB_QUERIES.labels(*labels).observe(len(timing.queries))
+    DB_DURATION.labels(*labels).observe(timing.db_duration())
+
+
+def count_writes(model, operation, count=1):
+    WRITES.labels(model._meta.model_name, operation).inc(count)
+
+
+def export_metrics():
+    """Метрики в текстовом формате Prometheus и их тип содержимого."""
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
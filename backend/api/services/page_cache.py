@@ -0,0 +1,168 @@
+import hashlib
+import json
+from functools import wraps
+
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Q
+from rest_framework.response import Response
+
+from api.services.cache_helper import bump_versions, get_versions
+from api.services.deferred import collect_on_commit
+from recipes.models import Recipe, Tag
+
+PAGE_CACHE_ALIAS = "pages"
+
+# Поколения: любой ответ, списки без фильтров, рецепт, автор и тег.
+ALL_KEY = "pages:recipes:all"
+LIST_KEY = "pages:recipes:list"
+# Параметры, входящие в ключ. Фильтры по избранному и корзине для
+# анонимных пользователей ничего не меняют и в ключ не входят.
+# Счётчики рецепта меняются без смены поколений и берутся из базы.
+COUNTER_FIELDS = ("favorites_count", "cart_count")
+KEY_PARAMS = ("page", "limit", "author", "cursor", "pagination", "count")
+IGNORED_PARAMS = ("is_favorited", "is_in_shopping_cart")
+
+
+def recipe_key(recipe_id):
+    return f"pages:recipe:{recipe_id}"
+
+
+def author_key(author_id):
+    return f"pages:author:{author_id}"
+
+
+def tag_key(slug):
+    return f"pages:tag:{slug}"
+
+
+def get_page_key(request, kwargs):
+    """Ключ ответа и ключи поколений или (None, None) для прочих запросов."""
+    params = request.query_params
+    if set(params) - {*KEY_PARAMS, *IGNORED_PARAMS, "tags"}:
+        return None, None
+    pk = kwargs.get("pk")
+    if pk is not None:
+        dependencies = [ALL_KEY, recipe_key(pk)]
+        query = {}
+    else:
+        query = {name: params[name] for name in KEY_PARAMS if name in params}
+        query["tags"] = sorted(set(params.getlist("tags")))
+        dependencies = [ALL_KEY, *map(tag_key, query["tags"])]
+        if "author" in query:
+            dependencies.append(author_key(query["author"]))
+        if not query["tags"] and "author" not in query:
+            dependencies.append(LIST_KEY)
+    digest = hashlib.sha256(
+        json.dumps([request.get_host(), pk, query], sort_keys=True).encode()
+    ).hexdigest()
+    return f"page:{digest}", dependencies
+
+
+def overlay_counters(data):
+    """Подставить в рецепты ответа текущие счётчики одним запросом."""
+    recipes = data["results"] if "results" in data else [data]
+    counters = {
+        row[0]: row[1:]
+        for row in Recipe.objects.filter(
+            id__in=[recipe["id"] for recipe in recipes]
+        ).values_list("id", *COUNTER_FIELDS)
+    }
+    for recipe in recipes:
+        values = counters.get(recipe["id"])
+        if values is not None:
+            recipe.update(zip(COUNTER_FIELDS, values))
+    return data
+
+
+def cache_anonymous_page(method):
+    """Кэш данных ответа list/retrieve для анонимных пользователей.
+
+    Запись действительна, пока не сменились поколения, от которых она
+    зависит: правка рецепта сбрасывает только его страницу, страницы его
+    автора и тегов и списки без фильтров.
+    """
+
+    @wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return method(view, request, *args, **kwargs)
+        key, dependencies = get_page_key(request, kwargs)
+        if key is None:
+            return method(view, request, *args, **kwargs)
+        pages = caches[PAGE_CACHE_ALIAS]
+        versions = get_versions(dependencies)
+        entry = pages.get(key)
+        if entry is not None and entry[0] == versions:
+            return Response(
+                overlay_counters(entry[1]), headers={"X-Cache": "HIT"}
+            )
+        response = method(view, request, *args, **kwargs)
+        if response.status_code == 200:
+            pages.set(key, (versions, response.data))
+        response["X-Cache"] = "MISS"
+        return response
+
+    return wrapper
+
+
+def invalidate(keys):
+    """Сменить поколения после фиксации транзакции."""
+    keys = list(keys)
+    transaction.on_commit(lambda: bump_versions(keys))
+
+
+def get_recipe_keys(recipe_ids, tag_ids=()):
+    """Поколения страниц рецептов, их авторов и тегов."""
+    author_ids = (
+        Recipe.objects.filter(id__in=recipe_ids)
+        .order_by()
+        .values_list("author_id", flat=True)
+        .distinct()
+    )
+    slugs = (
+        Tag.objects.filter(Q(recipes__in=recipe_ids) | Q(id__in=tag_ids))
+        .order_by()
+        .values_list("slug", flat=True)
+        .distinct()
+    )
+    return [
+        LIST_KEY,
+        *map(recipe_key, recipe_ids),
+        *map(author_key, author_ids),
+        *map(tag_key, slugs),
+    ]
+
+
+def invalidate_recipes(recipe_ids, tag_ids=()):
+    """Сбросить страницы рецептов, их авторов и тегов.
+
+    Рецепты копятся до фиксации транзакции, поэтому правка многих
+    ингредиентов рецепта стоит двух запросов, а не двух на ингредиент.
+    """
+    collect_on_commit(
+        flush_recipes,
+        [
+            *(("recipe", recipe_id) for recipe_id in recipe_ids),
+            *(("tag", tag_id) for tag_id in tag_ids),
+        ],
+    )
+
+
+def flush_recipes(values):
+    recipe_ids = [value for kind, value in values if kind == "recipe"]
+    tag_ids = [value for kind, value in values if kind == "tag"]
+    bump_versions(get_recipe_keys(recipe_ids, tag_ids))
+
+
+def invalidate_author(author):
+    """Сбросить страницы с данными автора."""
+    recipe_ids = list(author.recipes.values_list("id", flat=True))
+    if recipe_ids:
+        invalidate_recipes(recipe_ids)
+    invalidate([author_key(author.id)])
+
+
+def invalidate_all():
+    """Сбросить все страницы: изменились теги или ингредиенты."""
+    invalidate([ALL_KEY])
@@ -0,0 +1,84 @@
+import json
+
+from django.db import connections
+from django.db.models import (
+    BooleanField,
+    Prefetch,
+    Value,
+)
+from django.db.models.expressions import RawSQL
+
+from recipes.models import Recipe, RecipeIngredient, Subscribe, User
+
+# Связанные данные рецепта, которые нужны только для сборки его
+# представления и не загружаются для рецептов с кэшированным фрагментом.
+RECIPE_PREFETCH = (
+    "tags",
+    Prefetch(
+        "recipe_ingredients",
+        queryset=RecipeIngredient.objects.select_related("ingredient"),
+    ),
+)
+
+# Первые N рецептов каждого автора, на которого подписан пользователь.
+LIMITED_RECIPES_SQL = f"""
+    SELECT ranked.id FROM (
+        SELECT recipe.id, ROW_NUMBER() OVER (
+            PARTITION BY recipe.author_id ORDER BY recipe.id DESC
+        ) AS row_number
+        FROM {Recipe._meta.db_table} AS recipe
+        WHERE recipe.author_id IN (
+            SELECT author_id FROM {Subscribe._meta.db_table}
+            WHERE user_id = %s
+        )
+    ) AS ranked
+    WHERE ranked.row_number <= %s
+"""
+
+
+def get_recipes_queryset():
+    """Рецепты для чтения с автором.
+
+    Теги и ингредиенты догружает RecipeGetSerializer по RECIPE_PREFETCH,
+    флаги пользователя берутся из api.services.membership.
+    """
+    return Recipe.objects.select_related("author")
+
+
+def get_recipes_limit(request):
+    """Значение параметра recipes_limit или None."""
+    recipes_limit = request.query_params.get("recipes_limit")
+    if recipes_limit and recipes_limit.isdigit():
+        return int(recipes_limit)
+    return None
+
+
+def get_subscriptions_queryset(user, recipes_limit=None):
+    """Авторы из подписок с первыми N рецептами."""
+    recipes = Recipe.objects.all()
+    if recipes_limit is not None:
+        recipes = recipes.filter(
+            id__in=RawSQL(LIMITED_RECIPES_SQL, (user.id, recipes_limit))
+        )
+    return (
+        User.objects.filter(following__user=user)
+        .annotate(is_subscribed=Value(True, output_field=BooleanField()))
+        .prefetch_related(
+            Prefetch("recipes", queryset=recipes, to_attr="limited_recipes")
+        )
+        .order_by(*User._meta.ordering)
+    )
+
+
+def estimate_count(queryset, exact_below=0):
+    """Оценка числа строк по плану Postgres, на других СУБД точный COUNT.
+
+    Если оценка меньше exact_below, строки считаются точно.
+    """
+    if connections[queryset.db].vendor != "postgresql":
+        return queryset.count()
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    estimate = int(plan[0]["Plan"]["Plan Rows"])
+    if estimate < exact_below:
+        return queryset.count()
+    return estimate
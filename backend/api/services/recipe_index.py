@@ -0,0 +1,200 @@
+import heapq
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.db.models import Case, IntegerField, Value, When
+
+from api.services.cache_helper import (
+    bump_version,
+    get_version,
+    is_shared_cache,
+)
+from api.services.deferred import collect_on_commit
+from recipes.models import RecipeIngredient
+
+# Журнал изменений: номер последней записи и рецепты, изменённые в ней.
+JOURNAL_SEQ_KEY = "recipe-index:seq"
+JOURNAL_TIMEOUT = 24 * 60 * 60
+# Больше изменений дешевле загрузить заново, чем применять по одному.
+MAX_REPLAY = 1000
+# Версия индекса, когда журнал вести нельзя.
+INDEX_VERSION_KEY = "recipe-index:version"
+
+
+def journal_key(seq):
+    return f"recipe-index:change:{seq}"
+
+
+def has_journal():
+    """Журнал ведётся только в общем кэше с атомарным incr.
+
+    В LocMemCache журнал не виден другим процессам, а в FileBasedCache
+    и DatabaseCache два процесса могут получить один номер записи. Тогда
+    процессы при каждом изменении загружают индекс целиком; в работе
+    default — memcached или Redis (проверка api.E001).
+    """
+    return is_shared_cache(caches[DEFAULT_CACHE_ALIAS])
+
+
+def publish_changes(recipe_ids):
+    """Записать в журнал рецепты с изменённым составом."""
+    if not has_journal():
+        bump_version(INDEX_VERSION_KEY)
+        return
+    cache.add(JOURNAL_SEQ_KEY, 0, timeout=None)
+    seq = cache.incr(JOURNAL_SEQ_KEY)
+    cache.set(journal_key(seq), sorted(recipe_ids), timeout=JOURNAL_TIMEOUT)
+
+
+def schedule_index_update(recipe_ids):
+    """Обновить индекс рецептов после фиксации транзакции."""
+    collect_on_commit(publish_changes, recipe_ids)
+
+
+class RecipeIngredientIndex:
+    """Обратный индекс ингредиент -> id рецептов в памяти процесса.
+
+    Списки id хранятся отсортированными массивами. Процесс догоняет
+    другие по журналу изменений в общем кэше и перечитывает из базы
+    только изменённые рецепты; без журнала — загружает индекс заново
+    при смене версии. В _seq хранится номер журнала или версия.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seq = None
+        self._postings = {}
+        self._recipes = {}
+
+    def _build(self, seq):
+        """Загрузить состав всех рецептов."""
+        postings, recipes = {}, {}
+        rows = (
+            RecipeIngredient.objects.order_by("recipe_id", "ingredient_id")
+            .values_list("recipe_id", "ingredient_id")
+            .iterator(chunk_size=10000)
+        )
+        for recipe_id, ingredient_id in rows:
+            recipes.setdefault(recipe_id, array("q")).append(ingredient_id)
+            postings.setdefault(ingredient_id, array("q")).append(recipe_id)
+        self._postings, self._recipes = postings, recipes
+        self._seq = seq
+
+    def _reload(self, recipe_ids):
+        """Перечитать состав рецептов recipe_ids."""
+        rows = RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list("recipe_id", "ingredient_id")
+        current = {}
+        for recipe_id, ingredient_id in rows:
+            current.setdefault(recipe_id, set()).add(ingredient_id)
+        for recipe_id in recipe_ids:
+            old = set(self._recipes.pop(recipe_id, ()))
+            new = current.get(recipe_id, set())
+            for ingredient_id in old - new:
+                posting = self._postings[ingredient_id]
+                del posting[bisect_left(posting, recipe_id)]
+                if not posting:
+                    del self._postings[ingredient_id]
+            for ingredient_id in new - old:
+                insort(
+                    self._postings.setdefault(ingredient_id, array("q")),
+                    recipe_id,
+                )
+            if new:
+                self._recipes[recipe_id] = array("q", sorted(new))
+
+    def _catch_up(self, seq):
+        """Применить записи журнала или загрузить индекс заново."""
+        if self._seq is None or not 0 < seq - self._seq <= MAX_REPLAY:
+            return self._build(seq)
+        keys = [
+            journal_key(number) for number in range(self._seq + 1, seq + 1)
+        ]
+        changes = cache.get_many(keys)
+        if len(changes) < len(keys):
+            return self._build(seq)
+        self._reload(set().union(*changes.values()))
+        self._seq = seq
+
+    def _ensure_fresh(self):
+        if not has_journal():
+            version = get_version(INDEX_VERSION_KEY)
+            if self._seq != version:
+                self._build(version)
+            return
+        seq = cache.get(JOURNAL_SEQ_KEY, 0)
+        if self._seq != seq:
+            self._catch_up(seq)
+
+    def rebuild(self):
+        """Загрузить индекс заново и сообщить об этом другим процессам."""
+        with self._lock:
+            if not has_journal():
+                self._build(bump_version(INDEX_VERSION_KEY))
+                return len(self._recipes)
+            cache.add(JOURNAL_SEQ_KEY, 0, timeout=None)
+            # Скачок номера больше MAX_REPLAY заставит другие процессы
+            # тоже загрузить индекс целиком.
+            seq = cache.incr(JOURNAL_SEQ_KEY, MAX_REPLAY + 1)
+            self._build(seq)
+            return len(self._recipes)
+
+    def match(self, have, exclude=(), max_missing=0, limit=None):
+        """Рецепты из ингредиентов have, без exclude и с не более чем
+        max_missing недостающими ингредиентами.
+
+        Возвращает пары (id рецепта, число недостающих) по возрастанию
+        недостающих и убыванию id.
+        """
+        with self._lock:
+            self._ensure_fresh()
+            matched = Counter()
+            for ingredient_id in set(have):
+                matched.update(self._postings.get(ingredient_id, ()))
+            excluded = set()
+            for ingredient_id in set(exclude):
+                excluded.update(self._postings.get(ingredient_id, ()))
+            candidates = []
+            for recipe_id, count in matched.items():
+                missing = len(self._recipes[recipe_id]) - count
+                if missing <= max_missing and recipe_id not in excluded:
+                    candidates.append((missing, -recipe_id))
+        if limit is None:
+            candidates.sort()
+        else:
+            candidates = heapq.nsmallest(limit, candidates)
+        return [(-recipe_id, missing) for missing, recipe_id in candidates]
+
+
+recipe_index = RecipeIngredientIndex()
+
+
+def filter_by_ingredients(queryset, have, exclude=(), max_missing=0):
+    """Рецепты из имеющихся ингредиентов, ближайшие к полному набору
+    первыми; в выборку попадает не больше PANTRY_SEARCH_LIMIT рецептов.
+    """
+    ranked = recipe_index.match(
+        have, exclude, max_missing, limit=settings.PANTRY_SEARCH_LIMIT
+    )
+    if not ranked:
+        return queryset.none()
+    groups = {}
+    for recipe_id, missing in ranked:
+        groups.setdefault(missing, []).append(recipe_id)
+    missing_count = Case(
+        *(
+            When(id__in=group, then=Value(missing))
+            for missing, group in groups.items()
+        ),
+        output_field=IntegerField(),
+    )
+    return (
+        queryset.filter(id__in=[recipe_id for recipe_id, _ in ranked])
+        .annotate(missing_count=missing_count)
+        .order_by("missing_count", "-id")
+    )
@@ -0,0 +1,124 @@
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from api.services.deferred import collect_on_commit
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+
+# Postgres: столбец tsvector с GIN-индексом и русской морфологией.
+# SQLite: теневая таблица FTS5 с rowid, равным id рецепта.
+SEARCH_CONFIG = "russian"
+FTS_TABLE = "recipes_recipe_fts"
+RECIPE_TABLE = Recipe._meta.db_table
+# Веса полей: название, ингредиенты, описание.
+FTS_WEIGHTS = "10.0, 5.0, 1.0"
+
+INGREDIENT_NAMES_SQL = f"""
+    SELECT {{aggregate}} FROM {RecipeIngredient._meta.db_table} AS item
+    JOIN {Ingredient._meta.db_table} AS ingredient
+        ON ingredient.id = item.ingredient_id
+    WHERE item.recipe_id = recipe.id
+"""
+UPDATE_VECTOR_SQL = f"""
+    UPDATE {RECIPE_TABLE} AS recipe SET search_vector =
+        setweight(to_tsvector(%s::regconfig, recipe.name), 'A')
+        || setweight(to_tsvector(%s::regconfig, coalesce((
+            {INGREDIENT_NAMES_SQL.format(
+                aggregate="string_agg(ingredient.name, ' ')"
+            )}
+        ), '')), 'B')
+        || setweight(to_tsvector(%s::regconfig, recipe.text), 'C')
+    WHERE recipe.id = ANY(%s)
+"""
+INSERT_FTS_SQL = f"""
+    INSERT INTO {FTS_TABLE} (rowid, name, ingredients, text)
+    SELECT recipe.id, recipe.name, coalesce((
+        {INGREDIENT_NAMES_SQL.format(
+            aggregate="group_concat(ingredient.name, ' ')"
+        )}
+    ), ''), recipe.text
+    FROM {RECIPE_TABLE} AS recipe
+    WHERE recipe.id IN ({{placeholders}})
+"""
+
+
+def update_search_documents(recipe_ids):
+    """Пересобрать поисковые документы рецептов."""
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                UPDATE_VECTOR_SQL, [SEARCH_CONFIG] * 3 + [recipe_ids]
+            )
+        elif connection.vendor == "sqlite":
+            placeholders = ", ".join(["%s"] * len(recipe_ids))
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})",
+                recipe_ids,
+            )
+            cursor.execute(
+                INSERT_FTS_SQL.format(placeholders=placeholders), recipe_ids
+            )
+
+
+def schedule_search_update(recipe_ids):
+    """Обновить документы после фиксации, один раз на рецепт."""
+    collect_on_commit(update_search_documents, recipe_ids)
+
+
+def delete_search_document(recipe_id):
+    """Удалить документ из таблицы FTS5; столбец Postgres уходит с рецептом."""
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [recipe_id]
+            )
+
+
+def to_fts_query(query):
+    """Запрос FTS5: все слова как префиксы, спецсимволы отбрасываются."""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", query))
+
+
+def search_recipes(queryset, query):
+    """Рецепты, подходящие под запрос, по убыванию релевантности."""
+    if connection.vendor == "postgresql":
+        tsquery = "websearch_to_tsquery(%s::regconfig, %s)"
+        params = (SEARCH_CONFIG, query)
+        condition = RawSQL(
+            f'"{RECIPE_TABLE}"."search_vector" @@ {tsquery}',
+            params,
+            output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            f'ts_rank("{RECIPE_TABLE}"."search_vector", {tsquery})',
+            params,
+            output_field=FloatField(),
+        )
+    elif connection.vendor == "sqlite":
+        match = to_fts_query(query)
+        if not match:
+            return queryset.none()
+        condition = RawSQL(
+            f'"{RECIPE_TABLE}"."id" IN ('
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)",
+            (match,),
+            output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            f"(SELECT -bm25({FTS_TABLE}, {FTS_WEIGHTS}) FROM {FTS_TABLE} "
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = "{RECIPE_TABLE}"."id")',
+            (match,),
+            output_field=FloatField(),
+        )
+    else:
+        return queryset.filter(name__icontains=query)
+    return (
+        queryset.filter(condition)
+        .annotate(search_rank=rank)
+        .order_by("-search_rank", "-id")
+    )
@@ -1,46 +1,82 @@
+import json
+
+from api.services.membership import MODEL_KINDS, get_membership
 from recipes.models import RecipeIngredient
 
 
 def check_recipe(request, obj, model):
-    """Проверка рецепта."""
-    return (
-        request
-        and request.user.is_authenticated
-        and model.objects.filter(user=request.user, recipe=obj).exists()
+    """Проверка рецепта в избранном или корзине пользователя."""
+    return bool(request) and get_membership(request.user).contains(
+        MODEL_KINDS[model], obj.id
     )
 
 
 def check_subscribe(request, author):
     """Проверка подписки."""
-    return (
-        request.user.is_authenticated
-        and request.user.follower.filter(author=author).exists()
+    return bool(request) and get_membership(request.user).contains(
+        "follows", author.id
     )
 
 
-def add_ingredients(ingredients_data, recipe):
-    """Добавление ингредиентов к рецепту с сохранением ID."""
-    recipe_ingredients = []
-    existing_ingredients = {
-        ri.ingredient.id: ri
+def decode_form_list(values):
+    """Список из полей формы: JSON-массивы, JSON-объекты или значения."""
+    items = []
+    for value in values:
+        try:
+            decoded = json.loads(value)
+        except (TypeError, ValueError):
+            decoded = value
+        items.extend(decoded if isinstance(decoded, list) else [decoded])
+    return items
+
+
+def parse_recipe_form(data):
+    """Привести multipart-форму рецепта к виду JSON-запроса."""
+    result = data.dict()
+    for field in ("tags", "ingredients"):
+        if field in data:
+            result[field] = decode_form_list(data.getlist(field))
+    return result
+
+
+def set_ingredients(ingredients_data, recipe):
+    """Привести ингредиенты рецепта к переданным, изменив только разницу.
+
+    Возвращает прежние количества {ingredient_id: amount}.
+    """
+    existing = {
+        ri.ingredient_id: ri
         for ri in RecipeIngredient.objects.filter(recipe=recipe)
     }
+    old_amounts = {
+        ingredient_id: ri.amount for ingredient_id, ri in existing.items()
+    }
+    new_amounts = {item["id"]: item["amount"] for item in ingredients_data}
 
-    for item in ingredients_data:
-        ingredient_id = item["id"]
-        amount = item["amount"]
-
-        if ingredient_id in existing_ingredients:
-            existing_ingredients[ingredient_id].amount = amount
-            existing_ingredients[ingredient_id].save()
-        else:
-            recipe_ingredients.append(
+    to_create, to_update = [], []
+    for ingredient_id, amount in new_amounts.items():
+        recipe_ingredient = existing.get(ingredient_id)
+        if recipe_ingredient is None:
+            to_create.append(
                 RecipeIngredient(
                     recipe=recipe,
                     ingredient_id=ingredient_id,
                     amount=amount,
                 )
             )
+        elif recipe_ingredient.amount != amount:
+            recipe_ingredient.amount = amount
+            to_update.append(recipe_ingredient)
+    to_delete = [
+        ri.id
+        for ingredient_id, ri in existing.items()
+        if ingredient_id not in new_amounts
+    ]
 
-    if recipe_ingredients:
-        RecipeIngredient.objects.bulk_create(recipe_ingredients)
+    if to_delete:
+        RecipeIngredient.objects.filter(id__in=to_delete).delete()
+    if to_update:
+        RecipeIngredient.objects.bulk_update(to_update, ("amount",))
+    if to_create:
+        RecipeIngredient.objects.bulk_create(to_create)
+    return old_amounts
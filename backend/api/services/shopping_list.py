@@ -0,0 +1,206 @@
+import threading
+
+from django.db.models import Count, Sum
+
+from recipes.models import (
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingListItem,
+    User,
+)
+
+# Рецепты, удаляемые в текущем потоке: их корзины вычтены из списков
+# покупок разом, и каскадное удаление корзин не вычитает их повторно.
+_deleted_recipes = threading.local()
+
+
+def get_recipe_amounts(recipe):
+    """Количество каждого ингредиента рецепта."""
+    return dict(
+        RecipeIngredient.objects.filter(recipe=recipe).values_list(
+            "ingredient_id", "amount"
+        )
+    )
+
+
+def lock_recipes(recipe_ids):
+    """Заблокировать рецепты до конца транзакции.
+
+    Изменение ингредиентов рецепта и добавление его в корзину берут эту
+    блокировку до чтения состава и корзин, поэтому дельта считается по
+    тому составу, который увидит и другая сторона. Рецепты блокируются
+    раньше пользователей. FOR NO KEY UPDATE не конфликтует с блокировкой,
+    которую берёт внешний ключ вставляемой корзины.
+    """
+    list(
+        Recipe.objects.select_for_update(no_key=True)
+        .filter(id__in=recipe_ids)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+
+def apply_shopping_list_deltas(deltas):
+    """Применить изменения {(user_id, ingredient_id): (amount, count)}.
+
+    Вызывается внутри транзакции изменения корзины или рецепта после
+    lock_recipes.
+    """
+    if not deltas:
+        return
+    user_ids = {user_id for user_id, _ in deltas}
+    ingredient_ids = {ingredient_id for _, ingredient_id in deltas}
+    list(
+        User.objects.select_for_update()
+        .filter(id__in=user_ids)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    items = {
+        (item.user_id, item.ingredient_id): item
+        for item in ShoppingListItem.objects.select_for_update().filter(
+            user_id__in=user_ids, ingredient_id__in=ingredient_ids
+        )
+    }
+    to_create, to_update, to_delete = [], [], []
+    for (user_id, ingredient_id), (amount, count) in deltas.items():
+        item = items.get((user_id, ingredient_id))
+        if item is None:
+            if count > 0:
+                to_create.append(
+                    ShoppingListItem(
+                        user_id=user_id,
+                        ingredient_id=ingredient_id,
+                        total_amount=amount,
+                        recipe_count=count,
+                    )
+                )
+            continue
+        item.total_amount += amount
+        item.recipe_count += count
+        if item.recipe_count > 0:
+            to_update.append(item)
+        else:
+            to_delete.append(item.id)
+    if to_create:
+        ShoppingListItem.objects.bulk_create(to_create)
+    if to_update:
+        ShoppingListItem.objects.bulk_update(
+            to_update, ("total_amount", "recipe_count")
+        )
+    if to_delete:
+        ShoppingListItem.objects.filter(id__in=to_delete).delete()
+
+
+def change_shopping_list(user_id, recipe_ids, sign):
+    """Учесть рецепты, добавленные в корзину (sign=1) или удалённые (-1)."""
+    lock_recipes(recipe_ids)
+    deltas = {}
+    for ingredient_id, amount in RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list("ingredient_id", "amount"):
+        total, count = deltas.get((user_id, ingredient_id), (0, 0))
+        deltas[(user_id, ingredient_id)] = (
+            total + sign * amount,
+            count + sign,
+        )
+    apply_shopping_list_deltas(deltas)
+
+
+def remove_recipe_from_shopping_lists(recipe):
+    """Убрать удаляемый рецепт из списков покупок всех пользователей."""
+    lock_recipes([recipe.pk])
+    user_ids = ShoppingCart.objects.filter(recipe=recipe).values_list(
+        "user_id", flat=True
+    )
+    amounts = get_recipe_amounts(recipe)
+    apply_shopping_list_deltas({
+        (user_id, ingredient_id): (-amount, -1)
+        for user_id in user_ids
+        for ingredient_id, amount in amounts.items()
+    })
+    _deleted_recipes.__dict__.setdefault("ids", set()).add(recipe.pk)
+
+
+def is_recipe_deleted(recipe_id):
+    """Рецепт удаляется и уже вычтен из списков покупок."""
+    return recipe_id in _deleted_recipes.__dict__.get("ids", ())
+
+
+def forget_deleted_recipe(recipe_id):
+    _deleted_recipes.__dict__.get("ids", set()).discard(recipe_id)
+
+
+def change_recipe_in_shopping_lists(recipe, old_amounts, new_amounts):
+    """Учесть изменение ингредиентов рецепта в корзинах пользователей.
+
+    Рецепт должен быть заблокирован lock_recipes до чтения old_amounts.
+    """
+    changes = {}
+    for ingredient_id in old_amounts.keys() | new_amounts.keys():
+        old = old_amounts.get(ingredient_id)
+        new = new_amounts.get(ingredient_id)
+        if old == new:
+            continue
+        changes[ingredient_id] = (
+            (new or 0) - (old or 0),
+            (new is not None) - (old is not None),
+        )
+    if not changes:
+        return
+    user_ids = ShoppingCart.objects.filter(recipe=recipe).values_list(
+        "user_id", flat=True
+    )
+    apply_shopping_list_deltas({
+        (user_id, ingredient_id): change
+        for user_id in user_ids
+        for ingredient_id, change in changes.items()
+    })
+
+
+def rebuild_shopping_lists(user_ids, fix=True):
+    """Пересчитать списки покупок пользователей и вернуть число расхождений."""
+    expected = {
+        (row["recipe__carts__user_id"], row["ingredient_id"]): (
+            row["total_amount"],
+            row["recipe_count"],
+        )
+        for row in RecipeIngredient.objects.filter(
+            recipe__carts__user_id__in=user_ids
+        )
+        .values("recipe__carts__user_id", "ingredient_id")
+        .annotate(total_amount=Sum("amount"), recipe_count=Count("recipe_id"))
+        .order_by()
+    }
+    stored = {
+        (user_id, ingredient_id): (total_amount, recipe_count)
+        for user_id, ingredient_id, total_amount, recipe_count in (
+            ShoppingListItem.objects.filter(user_id__in=user_ids)
+            .values_list(
+                "user_id", "ingredient_id", "total_amount", "recipe_count"
+            )
+        )
+    }
+    drifted = {
+        key
+        for key in expected.keys() | stored.keys()
+        if expected.get(key) != stored.get(key)
+    }
+    if drifted and fix:
+        drifted_users = {user_id for user_id, _ in drifted}
+        ShoppingListItem.objects.filter(user_id__in=drifted_users).delete()
+        ShoppingListItem.objects.bulk_create(
+            ShoppingListItem(
+                user_id=user_id,
+                ingredient_id=ingredient_id,
+                total_amount=total_amount,
+                recipe_count=recipe_count,
+            )
+            for (user_id, ingredient_id), (
+                total_amount,
+                recipe_count,
+            ) in expected.items()
+            if user_id in drifted_users
+        )
+    return len(drifted)
@@ -0,0 +1,106 @@
+import threading
+
+from django.db.models import F
+
+from api.services.catalog import get_catalog_version
+from recipes.models import Recipe, Tag
+
+# Бит тега с id N в Recipe.tags_mask: 1 << (N - 1). Бит 64 оставлен
+# свободным, чтобы маска была положительной.
+TAG_BITS = 63
+
+
+def tag_bit(tag_id):
+    """Бит тега в маске или 0 для тегов без бита."""
+    return 1 << (tag_id - 1) if 0 < tag_id <= TAG_BITS else 0
+
+
+def get_tags_mask(tag_ids):
+    """Маска тегов или None, если у какого-то тега нет бита."""
+    mask = 0
+    for tag_id in tag_ids:
+        bit = tag_bit(tag_id)
+        if not bit:
+            return None
+        mask |= bit
+    return mask
+
+
+class TagSlugs:
+    """Слаги тегов и их id для текущей версии справочников."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._ids = None
+
+    def get(self):
+        version = get_catalog_version()
+        with self._lock:
+            if self._ids is None or version != self._version:
+                self._ids = dict(Tag.objects.values_list("slug", "id"))
+                self._version = version
+            return self._ids
+
+
+tag_slugs = TagSlugs()
+
+
+def get_tag_choices():
+    """Варианты фильтра по тегам без запроса к базе."""
+    return [(slug, slug) for slug in tag_slugs.get()]
+
+
+def filter_by_tags(queryset, slugs):
+    """Рецепты с любым из тегов одним битовым условием, без JOIN."""
+    ids = tag_slugs.get()
+    tag_ids = [ids[slug] for slug in slugs if slug in ids]
+    mask = get_tags_mask(tag_ids)
+    if mask is None:
+        return queryset.filter(tags__in=tag_ids).distinct()
+    return queryset.alias(
+        tag_bits=F("tags_mask").bitand(mask)
+    ).filter(tag_bits__gt=0)
+
+
+def update_tags_masks(recipe_ids):
+    """Пересчитать маски тегов рецептов recipe_ids."""
+    masks = dict.fromkeys(recipe_ids, 0)
+    rows = Recipe.tags.through.objects.filter(
+        recipe_id__in=masks
+    ).values_list("recipe_id", "tag_id")
+    for recipe_id, tag_id in rows:
+        masks[recipe_id] |= tag_bit(tag_id)
+    groups = {}
+    for recipe_id, mask in masks.items():
+        groups.setdefault(mask, []).append(recipe_id)
+    for mask, ids in groups.items():
+        Recipe.objects.filter(id__in=ids).update(tags_mask=mask)
+
+
+def change_tag_bits(recipe_ids, tag_ids, add):
+    """Установить или снять биты тегов tag_ids одним UPDATE.
+
+    Выполняется в транзакции изменения тегов: маска меняется вместе со
+    связями, а запись без предварительного чтения не теряет параллельные
+    правки. Возвращает маску изменённых битов.
+    """
+    mask = get_tags_mask(
+        tag_id for tag_id in tag_ids if tag_bit(tag_id)
+    )
+    if mask and recipe_ids:
+        bits = (
+            F("tags_mask").bitor(mask) if add
+            else F("tags_mask").bitand(~mask)
+        )
+        Recipe.objects.filter(id__in=recipe_ids).update(tags_mask=bits)
+    return mask
+
+
+def clear_tag_bit(tag_id):
+    """Снять бит удалённого тега: связи удаляются без m2m_changed."""
+    bit = tag_bit(tag_id)
+    if bit:
+        Recipe.objects.alias(
+            tag_bits=F("tags_mask").bitand(bit)
+        ).filter(tag_bits__gt=0).update(tags_mask=F("tags_mask") - bit)
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.http.multipartparser import MultiPartParserError
+
+from api.services.constants import ERROR_MESSAGES, IMAGE_SIGNATURES
+
+
+class ImageUploadError(MultiPartParserError):
+    """Загружаемый файл не прошёл раннюю проверку."""
+
+
+def is_image_header(header):
+    """Проверить сигнатуру JPEG, PNG, GIF или WebP."""
+    return header.startswith(IMAGE_SIGNATURES) or (
+        header[:4] == b"RIFF" and header[8:12] == b"WEBP"
+    )
+
+
+def check_image_size(size):
+    if size > settings.MAX_IMAGE_UPLOAD_SIZE:
+        raise ImageUploadError(ERROR_MESSAGES["image_too_large"])
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """Потоковая запись изображения во временный файл.
+
+    Размер и формат проверяются по мере поступления данных, до
+    декодирования изображения.
+    """
+
+    def new_file(self, field_name, file_name, content_type, content_length,
+                 *args, **kwargs):
+        if content_length:
+            check_image_size(content_length)
+        super().new_file(
+            field_name, file_name, content_type, content_length,
+            *args, **kwargs
+        )
+
+    def receive_data_chunk(self, raw_data, start):
+        if start == 0 and not is_image_header(raw_data):
+            raise ImageUploadError(ERROR_MESSAGES["invalid_image"])
+        check_image_size(start + len(raw_data))
+        return super().receive_data_chunk(raw_data, start)
+
+
+class ImageUploadMixin:
+    """Файлы действий image_upload_actions принимаются через
+    ImageUploadHandler, остальные запросы — обработчиками Django.
+    """
+
+    image_upload_actions = ()
+
+    def initialize_request(self, request, *args, **kwargs):
+        action = self.action_map.get(request.method.lower())
+        if action in self.image_upload_actions:
+            request.upload_handlers = [ImageUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
@@ -1,10 +1,26 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+import re
+from itertools import chain
+
+from django.db import transaction
+from django.http import (
+    HttpResponse,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
 from rest_framework import status
 from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 
-from recipes.models import Recipe, RecipeIngredient
+from api.serializers import BatchSerializer
+from api.services.batch import apply_batch
+from api.services.catalog import catalog_snapshots
+from api.services.constants import EXPORT_CHUNK_SIZE
+from api.services.exporters import EXPORTERS
+from recipes.models import Recipe, ShoppingListItem
+
+ACCEPTS_GZIP = re.compile(r"\bgzip\b")
 
 
 class RecipeProcessor:
@@ -18,15 +34,18 @@ class RecipeProcessor:
             context={"request": request},
         )
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        with transaction.atomic():
+            serializer.save()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @staticmethod
     def __delete_recipe(model, request, err_msg, recipe):
         """Удалить рецепт."""
-        obj = model.objects.filter(user=request.user, recipe=recipe)
-        if obj.exists():
-            obj.delete()
+        with transaction.atomic():
+            deleted, _ = model.objects.filter(
+                user=request.user, recipe=recipe
+            ).delete()
+        if deleted:
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response({"error": err_msg}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -41,29 +60,72 @@ class RecipeProcessor:
             return self.__delete_recipe(model, request, err_msg, recipe)
 
 
+def process_batch(request, model):
+    """Добавить и удалить пачку связей пользователя, статус по каждому id."""
+    serializer = BatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    results = apply_batch(
+        request.user,
+        model,
+        serializer.validated_data["add"],
+        serializer.validated_data["remove"],
+    )
+    return Response({"results": results}, status=status.HTTP_200_OK)
+
+
 def get_shopping_cart(request):
     """Получить файл со списком покупок."""
     user = request.user
-    if not user.carts.exists():
-        return Response(status=status.HTTP_400_BAD_REQUEST)
-
+    file_format = request.query_params.get("format", "txt")
+    if file_format not in EXPORTERS:
+        return Response(
+            {"error": f"Неподдерживаемый формат: {file_format}."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
     ingredients = (
-        RecipeIngredient.objects.filter(recipe__carts__user=request.user)
-        .values(
+        ShoppingListItem.objects.filter(user=user)
+        .values_list(
             "ingredient__name",
             "ingredient__measurement_unit",
+            "total_amount",
         )
-        .annotate(ingredient_amount=Sum("amount"))
+        .order_by("ingredient__name")
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
     )
-    shopping_list = f"Список покупок пользователя {user}:\n"
-
-    for ingredient in ingredients:
-        name = ingredient["ingredient__name"]
-        unit = ingredient["ingredient__measurement_unit"]
-        amount = ingredient["ingredient_amount"]
-        shopping_list += f"\n{name} - {amount}/{unit}"
+    first = next(ingredients, None)
+    if first is None:
+        return Response(status=status.HTTP_400_BAD_REQUEST)
 
-    file_name = f"{user}_shopping_cart.txt"
-    response = HttpResponse(shopping_list, content_type="text/plain")
+    writer, content_type = EXPORTERS[file_format]
+    response = StreamingHttpResponse(
+        writer(user, chain((first,), ingredients)),
+        content_type=content_type,
+    )
+    file_name = f"{user}_shopping_cart.{file_format}"
     response["Content-Disposition"] = f"attachment; filename={file_name}"
     return response
+
+
+def get_catalog_response(request, name):
+    """Ответ со снимком справочника с поддержкой ETag и gzip."""
+    snapshot = catalog_snapshots.get(name)
+    use_gzip = bool(
+        ACCEPTS_GZIP.search(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    )
+    etag = snapshot.gzip_etag if use_gzip else snapshot.etag
+    if_none_match = parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+    if "*" in if_none_match or {
+        snapshot.etag, snapshot.gzip_etag
+    } & set(if_none_match):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(
+            snapshot.gzip_body if use_gzip else snapshot.body,
+            content_type="application/json",
+        )
+        if use_gzip:
+            response["Content-Encoding"] = "gzip"
+    response["ETag"] = etag
+    response["Cache-Control"] = "public, no-cache"
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
@@ -0,0 +1,299 @@
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from api.services.batch import get_relation_target, relations_changed
+from api.services.catalog import schedule_catalog_version_bump
+from api.services.counters import change_counter, change_counters
+from api.services.feed import backfill_feed, clear_feed, schedule_fan_out
+from api.services.images import build_derivatives
+from api.services.membership import refresh_membership
+from api.services.metrics import count_writes
+from api.services.page_cache import (
+    get_recipe_keys,
+    invalidate,
+    invalidate_all,
+    invalidate_author,
+    invalidate_recipes,
+)
+from api.services.recipe_index import schedule_index_update
+from api.services.search import (
+    delete_search_document,
+    schedule_search_update,
+)
+from api.services.shopping_list import (
+    change_shopping_list,
+    forget_deleted_recipe,
+    is_recipe_deleted,
+    remove_recipe_from_shopping_lists,
+)
+from api.services.tag_mask import change_tag_bits, clear_tag_bit
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Subscribe,
+    Tag,
+    User,
+)
+
+# Поле изображения и поле хеша производных изображений модели.
+IMAGE_FIELDS = {
+    Recipe: ("image", "image_hash"),
+    User: ("avatar", "avatar_hash"),
+}
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_catalogs(**kwargs):
+    """Сбросить снимки справочников, индекс ингредиентов и страницы."""
+    schedule_catalog_version_bump()
+    invalidate_all()
+
+
+@receiver(post_save, sender=Recipe)
+def invalidate_recipe_pages(instance, **kwargs):
+    invalidate_recipes([instance.pk])
+
+
+@receiver(pre_delete, sender=Recipe)
+def invalidate_deleted_recipe_pages(instance, **kwargs):
+    """Автор и теги удаляемого рецепта известны только до удаления."""
+    invalidate(get_recipe_keys([instance.pk]))
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def invalidate_recipe_ingredient_pages(instance, **kwargs):
+    invalidate_recipes([instance.recipe_id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tag_pages(instance, action, reverse, pk_set, **kwargs):
+    """Сбросить страницы рецепта и тегов, которые у него были и стали."""
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if reverse:
+        recipe_ids = pk_set or instance.recipes.values_list("id", flat=True)
+        invalidate_recipes(recipe_ids, tag_ids=[instance.pk])
+    else:
+        # После фиксации теги рецепта уже новые, поэтому снятые теги
+        # передаются явно: при clear их берут до удаления связей.
+        tag_ids = pk_set or instance.tags.values_list("id", flat=True)
+        invalidate_recipes([instance.pk], tag_ids=tag_ids)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def update_recipe_tags_mask(instance, action, reverse, pk_set, **kwargs):
+    """Обновить маски тегов рецептов в той же транзакции, что и связи."""
+    if reverse and action == "pre_clear":
+        instance._cleared_recipe_ids = list(
+            instance.recipes.values_list("id", flat=True)
+        )
+    if action == "post_clear":
+        if reverse:
+            change_tag_bits(
+                instance.__dict__.pop("_cleared_recipe_ids"),
+                [instance.pk],
+                add=False,
+            )
+        else:
+            Recipe.objects.filter(pk=instance.pk).update(tags_mask=0)
+            instance.tags_mask = 0
+    elif action in ("post_add", "post_remove"):
+        add = action == "post_add"
+        if reverse:
+            change_tag_bits(pk_set, [instance.pk], add)
+            return
+        mask = change_tag_bits([instance.pk], pk_set, add)
+        # Последующий save() рецепта не должен вернуть старую маску.
+        if add:
+            instance.tags_mask |= mask
+        else:
+            instance.tags_mask &= ~mask
+
+
+@receiver(post_delete, sender=Tag)
+def clear_deleted_tag_bit(instance, **kwargs):
+    clear_tag_bit(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_pages(instance, update_fields=None, **kwargs):
+    """Сбросить страницы автора, кроме сохранения времени входа."""
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    invalidate_author(instance)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_save, sender=Subscribe)
+def send_created_relation(sender, instance, created, **kwargs):
+    """Одиночная связь — пачка из одного id для relations_changed."""
+    if created:
+        relations_changed.send(
+            sender,
+            user_id=instance.user_id,
+            added=[get_relation_target(instance)],
+            removed=[],
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=Subscribe)
+def send_deleted_relation(sender, instance, **kwargs):
+    relations_changed.send(
+        sender,
+        user_id=instance.user_id,
+        added=[],
+        removed=[get_relation_target(instance)],
+    )
+
+
+@receiver(relations_changed)
+def count_relation_writes(sender, added, removed, **kwargs):
+    if added:
+        count_writes(sender, "created", len(added))
+    if removed:
+        count_writes(sender, "deleted", len(removed))
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_new_recipe(instance, created, **kwargs):
+    """Разослать новый рецепт по лентам подписчиков автора."""
+    if created:
+        schedule_fan_out(instance)
+
+
+@receiver(relations_changed)
+def refresh_relation_membership(sender, user_id, **kwargs):
+    """Сбросить кэш избранного, корзины или подписок пользователя."""
+    refresh_membership(user_id, sender)
+
+
+@receiver(relations_changed, sender=Subscribe)
+def update_subscription_feed(user_id, added, removed, **kwargs):
+    """Дополнить ленту рецептами новых авторов и убрать прежних."""
+    if added:
+        backfill_feed(user_id, added)
+    if removed:
+        clear_feed(user_id, removed)
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search_document(instance, **kwargs):
+    schedule_search_update([instance.pk])
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def update_ingredients_search_document(instance, **kwargs):
+    schedule_search_update([instance.recipe_id])
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_recipes_search_documents(instance, created, **kwargs):
+    """Название ингредиента входит в документы его рецептов."""
+    if not created:
+        schedule_search_update(
+            instance.recipe_ingredients.values_list("recipe_id", flat=True)
+        )
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_index(instance, **kwargs):
+    """Ингредиенты сохраняются пачкой после рецепта, без сигналов."""
+    schedule_index_update([instance.pk])
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def update_recipe_ingredient_index(instance, **kwargs):
+    schedule_index_update([instance.recipe_id])
+
+
+@receiver(post_delete, sender=Recipe)
+def delete_recipe_search_document(instance, **kwargs):
+    delete_search_document(instance.pk)
+
+
+@receiver(post_save, sender=Recipe)
+def increment_counter(instance, created, **kwargs):
+    """Увеличить счётчик рецептов автора."""
+    if created:
+        change_counter(instance, 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_counter(instance, **kwargs):
+    change_counter(instance, -1)
+
+
+@receiver(relations_changed, sender=Favorite)
+@receiver(relations_changed, sender=ShoppingCart)
+def change_relation_counters(sender, added, removed, **kwargs):
+    """Изменить счётчики избранного и корзин рецептов."""
+    if added:
+        change_counters(sender, added, 1)
+    if removed:
+        change_counters(sender, removed, -1)
+
+
+@receiver(pre_delete, sender=Recipe)
+def remove_deleted_recipe_from_shopping_lists(instance, **kwargs):
+    """Вычесть удаляемый рецепт из списков покупок."""
+    remove_recipe_from_shopping_lists(instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def forget_deleted_recipe_carts(instance, **kwargs):
+    forget_deleted_recipe(instance.pk)
+
+
+@receiver(relations_changed, sender=ShoppingCart)
+def change_cart_shopping_list(user_id, added, removed, **kwargs):
+    """Прибавить ингредиенты добавленных рецептов и вычесть удалённых,
+    кроме рецептов, которые удаляются целиком.
+    """
+    removed = [
+        recipe_id for recipe_id in removed if not is_recipe_deleted(recipe_id)
+    ]
+    if added:
+        change_shopping_list(user_id, added, 1)
+    if removed:
+        change_shopping_list(user_id, removed, -1)
+
+
+@receiver(post_init, sender=Recipe)
+@receiver(post_init, sender=User)
+def remember_image_name(sender, instance, **kwargs):
+    """Запомнить исходное имя файла изображения."""
+    value = instance.__dict__.get(IMAGE_FIELDS[sender][0])
+    instance._original_image_name = getattr(value, "name", value)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=User)
+def build_image_derivatives(sender, instance, **kwargs):
+    """Создать производные изображения после загрузки нового файла."""
+    image_field, hash_field = IMAGE_FIELDS[sender]
+    image = getattr(instance, image_field)
+    name = image.name if image else None
+    if name == getattr(instance, "_original_image_name", None):
+        return
+    digest = build_derivatives(image) if image else ""
+    sender.objects.filter(pk=instance.pk).update(**{hash_field: digest})
+    setattr(instance, hash_field, digest)
+    instance._original_image_name = name
@@ -0,0 +1,107 @@
+import base64
+import io
+import tempfile
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart, Subscribe, Tag, User)
+
+# Кэши процесса, чтобы тесты не зависели от общего memcached.
+TEST_CACHES = {
+    alias: {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": f"foodgram-tests-{alias}",
+    }
+    for alias in ("default", "versions", "pages")
+}
+
+
+def image_base64():
+    """Картинка в формате, который принимает Base64ImageField."""
+    buffer = io.BytesIO()
+    Image.new("RGB", (4, 4), "red").save(buffer, "PNG")
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f"data:image/png;base64,{encoded}"
+
+
+@override_settings(CACHES=TEST_CACHES, MEDIA_ROOT=tempfile.mkdtemp())
+class FoodgramTestCase(TransactionTestCase):
+    """Тесты API с фиксацией транзакций.
+
+    Сброс кэшей, рассылка по лентам и обновление индексов выполняются в
+    on_commit, поэтому тесты не оборачиваются в общую транзакцию.
+    """
+
+    def setUp(self):
+        # После очистки базы id повторяются: кэши прошлого теста мешают.
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+
+    def count_queries(self, method, url, *args, **kwargs):
+        """Ответ запроса клиента и число выполненных SQL-запросов."""
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, *args, **kwargs)
+        return response, len(context)
+
+    def create_user(self, number):
+        return User.objects.create_user(
+            username=f"user{number}",
+            email=f"user{number}@example.com",
+            password="password",
+            first_name="Имя",
+            last_name="Фамилия",
+        )
+
+    def create_catalog(self, ingredients=40):
+        Tag.objects.bulk_create(
+            Tag(name=name, slug=slug)
+            for name, slug in (
+                ("Завтрак", "breakfast"),
+                ("Обед", "lunch"),
+                ("Ужин", "dinner"),
+            )
+        )
+        self.tags = list(Tag.objects.order_by("id"))
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f"Ингредиент {number}", measurement_unit="г")
+            for number in range(ingredients)
+        )
+        self.ingredients = list(Ingredient.objects.order_by("id"))
+
+    def create_recipes(self, authors, count, ingredients=3):
+        """Рецепты с тегом и ингредиентами по кругу от авторов authors."""
+        recipes = []
+        for number in range(count):
+            recipe = Recipe.objects.create(
+                name=f"Рецепт {number}",
+                text="Описание",
+                author=authors[number % len(authors)],
+                cooking_time=5,
+                image="recipes/images/test.png",
+            )
+            recipe.tags.set([self.tags[number % len(self.tags)]])
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe,
+                    ingredient=self.ingredients[
+                        (number + shift) % len(self.ingredients)
+                    ],
+                    amount=10 + shift,
+                )
+                for shift in range(ingredients)
+            )
+            recipes.append(recipe)
+        return recipes
+
+    def create_relations(self, user, recipes, authors):
+        """Избранное, корзина и подписки пользователя."""
+        for recipe in recipes:
+            Favorite.objects.create(user=user, recipe=recipe)
+            ShoppingCart.objects.create(user=user, recipe=recipe)
+        for author in authors:
+            Subscribe.objects.create(user=user, author=author)
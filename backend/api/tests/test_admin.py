@@ -0,0 +1,94 @@
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.fixtures import FoodgramTestCase
+from recipes.models import User
+
+CHANGELISTS = (
+    "/admin/recipes/recipe/",
+    "/admin/recipes/favorite/",
+    "/admin/recipes/shoppingcart/",
+    "/admin/recipes/subscribe/",
+    "/admin/recipes/user/",
+    "/admin/recipes/ingredient/",
+)
+
+
+class AdminChangelistQueriesTest(FoodgramTestCase):
+    """Число запросов страницы админки не зависит от числа строк."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_catalog()
+        self.authors = [self.create_user(number) for number in range(10)]
+        admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="password"
+        )
+        self.client = Client()
+        self.client.force_login(admin)
+
+    def fill(self, size, subscribers):
+        """Рецепты и связи так, чтобы на странице было до size строк."""
+        recipes = self.create_recipes(self.authors, size)
+        for user in subscribers:
+            authors = [author for author in self.authors if author != user]
+            self.create_relations(user, recipes[:size // 5], authors[:5])
+
+    def count_changelists(self):
+        counts = {}
+        for url in CHANGELISTS:
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            counts[url] = len(context)
+        return counts
+
+    def test_changelist_queries_do_not_depend_on_rows(self):
+        self.fill(5, self.authors[:1])
+        few = self.count_changelists()
+        self.fill(30, self.authors[1:6])
+        many = self.count_changelists()
+        self.assertEqual(few, many)
+
+    def test_filtered_changelists(self):
+        self.fill(10, self.authors[1:3])
+        author = self.authors[0]
+        for url in (
+            f"/admin/recipes/recipe/?author={author.id}",
+            f"/admin/recipes/recipe/?tags__id__exact={self.tags[0].id}",
+            "/admin/recipes/recipe/?q=Рецепт",
+            f"/admin/recipes/subscribe/?author={author.id}",
+            "/admin/recipes/favorite/?q=user1",
+        ):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertGreater(response.context["cl"].result_count, 0, url)
+
+    def test_user_filters_use_autocomplete(self):
+        self.fill(10, self.authors[1:3])
+        author = self.authors[0]
+        response = self.client.get(
+            f"/admin/recipes/recipe/?author={author.id}"
+        )
+        recipes = response.context["cl"].result_list
+        self.assertEqual({recipe.author_id for recipe in recipes}, {author.id})
+        content = response.content.decode()
+        self.assertIn('data-field-name="author"', content)
+        self.assertIn(
+            f'<option value="{author.id}" selected>{author.username}</option>',
+            content,
+        )
+        self.assertIn("admin/js/autocomplete.js", content)
+        response = self.client.get(
+            "/admin/autocomplete/",
+            {
+                "term": "user2",
+                "app_label": "recipes",
+                "model_name": "favorite",
+                "field_name": "user",
+            },
+        )
+        self.assertEqual(
+            [item["text"] for item in response.json()["results"]], ["user2"]
+        )
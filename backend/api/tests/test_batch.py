@@ -0,0 +1,112 @@
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.services.counters import recount
+from api.services.shopping_list import rebuild_shopping_lists
+from api.tests.fixtures import FoodgramTestCase
+from recipes.models import FeedEntry, Favorite, Recipe, ShoppingCart
+
+
+class BatchRelationsTest(FoodgramTestCase):
+    """Избранное, корзина и подписки пачкой в одном запросе."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_catalog()
+        self.user = self.create_user(0)
+        self.authors = [self.create_user(number) for number in (1, 2)]
+        self.recipes = self.create_recipes(self.authors, 4)
+        # По токену: пользователь загружается заново в каждом запросе.
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user)}"
+        )
+
+    def batch(self, url, add=(), remove=()):
+        response = self.client.post(
+            url, {"add": list(add), "remove": list(remove)}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return {
+            item["id"]: item["status"] for item in response.json()["results"]
+        }
+
+    def recipe_ids(self, *indexes):
+        return [self.recipes[index].id for index in indexes]
+
+    def flags(self, field):
+        response = self.client.get("/api/recipes/?limit=10")
+        return sorted(
+            recipe["id"]
+            for recipe in response.json()["results"]
+            if recipe[field]
+        )
+
+    def assertNoDrift(self):
+        recipe_ids = Recipe.objects.values_list("id", flat=True)
+        self.assertEqual(recount(Recipe, recipe_ids, fix=False), 0)
+        self.assertEqual(rebuild_shopping_lists([self.user.id], False), 0)
+
+    def test_favorite_statuses_and_state(self):
+        url = "/api/recipes/favorite/batch/"
+        Favorite.objects.create(user=self.user, recipe=self.recipes[0])
+        first, second, third, fourth = self.recipe_ids(0, 1, 2, 3)
+        statuses = self.batch(url, add=[first, second, 10 ** 6])
+        self.assertEqual(
+            statuses,
+            {first: "exists", second: "added", 10 ** 6: "not_found"},
+        )
+        self.assertEqual(self.flags("is_favorited"), [first, second])
+        statuses = self.batch(url, add=[third], remove=[first, fourth])
+        self.assertEqual(
+            statuses, {third: "added", first: "removed", fourth: "absent"}
+        )
+        self.assertEqual(self.flags("is_favorited"), [second, third])
+        self.assertEqual(
+            dict(Recipe.objects.values_list("id", "favorites_count")),
+            {first: 0, second: 1, third: 1, fourth: 0},
+        )
+        self.assertNoDrift()
+
+    def test_cart_batch_matches_single_writes(self):
+        url = "/api/recipes/shopping_cart/batch/"
+        self.batch(url, add=self.recipe_ids(0, 1, 2))
+        self.client.delete(f"/api/recipes/{self.recipes[1].id}/shopping_cart/")
+        self.batch(url, add=self.recipe_ids(3), remove=self.recipe_ids(0))
+        self.assertEqual(
+            sorted(
+                ShoppingCart.objects.filter(user=self.user).values_list(
+                    "recipe_id", flat=True
+                )
+            ),
+            self.recipe_ids(2, 3),
+        )
+        self.assertEqual(
+            self.flags("is_in_shopping_cart"), self.recipe_ids(2, 3)
+        )
+        self.assertNoDrift()
+
+    def test_subscribe_batch_updates_feed(self):
+        url = "/api/users/subscribe/batch/"
+        first, second = (author.id for author in self.authors)
+        statuses = self.batch(url, add=[first, second, self.user.id])
+        self.assertEqual(
+            statuses,
+            {first: "added", second: "added", self.user.id: "invalid"},
+        )
+        self.assertEqual(FeedEntry.objects.filter(user=self.user).count(), 4)
+        self.batch(url, remove=[first])
+        self.assertEqual(
+            set(
+                FeedEntry.objects.filter(user=self.user).values_list(
+                    "author_id", flat=True
+                )
+            ),
+            {second},
+        )
+
+    def test_invalid_batches(self):
+        url = "/api/recipes/favorite/batch/"
+        for data in ({}, {"add": [1], "remove": [1]}):
+            response = self.client.post(url, data, format="json")
+            self.assertEqual(response.status_code, 400, data)
@@ -0,0 +1,52 @@
+from django.db import transaction
+from django.test import Client
+
+from api.services.catalog import catalog_snapshots, get_catalog_version
+from api.tests.fixtures import FoodgramTestCase
+from recipes.models import Tag
+
+
+class CatalogSnapshotTest(FoodgramTestCase):
+    """Снимки справочников меняются только после фиксации правки."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_catalog()
+        self.client = Client()
+
+    def test_etag_and_not_modified(self):
+        response = self.client.get("/api/tags/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [tag["slug"] for tag in response.json()],
+            ["breakfast", "lunch", "dinner"],
+        )
+        cached = self.client.get(
+            "/api/tags/", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(cached.status_code, 304)
+
+    def test_version_changes_after_commit(self):
+        etag = self.client.get("/api/tags/")["ETag"]
+        version = get_catalog_version()
+        with transaction.atomic():
+            Tag.objects.create(name="Десерт", slug="dessert")
+            # Снимок, собранный до фиксации, остаётся старым.
+            self.assertEqual(get_catalog_version(), version)
+            catalog_snapshots.get("tags")
+        self.assertNotEqual(get_catalog_version(), version)
+        response = self.client.get("/api/tags/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            "dessert", [tag["slug"] for tag in response.json()]
+        )
+
+    def test_rolled_back_change_keeps_version(self):
+        version = get_catalog_version()
+        try:
+            with transaction.atomic():
+                Tag.objects.create(name="Десерт", slug="dessert")
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(get_catalog_version(), version)
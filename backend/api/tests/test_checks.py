@@ -0,0 +1,56 @@
+from django.test import SimpleTestCase, override_settings
+
+from api.checks import check_shared_caches
+
+
+def get_caches(backend, location):
+    return {
+        alias: {"BACKEND": backend, "LOCATION": location}
+        for alias in ("default", "versions", "pages")
+    }
+
+
+class SharedCacheCheckTest(SimpleTestCase):
+    """Проверка api.E001: default и versions общие для процессов."""
+
+    @override_settings(
+        SHARED_CACHE_REQUIRED=True,
+        CACHES=get_caches(
+            "django.core.cache.backends.filebased.FileBasedCache",
+            "/tmp/foodgram-check",
+        ),
+    )
+    def test_filebased_is_rejected(self):
+        errors = check_shared_caches(None)
+        self.assertEqual([error.id for error in errors], ["api.E001"] * 2)
+        self.assertEqual(
+            [error.obj for error in errors], ["default", "versions"]
+        )
+
+    @override_settings(
+        SHARED_CACHE_REQUIRED=True,
+        CACHES=get_caches(
+            "django.core.cache.backends.locmem.LocMemCache", "check"
+        ),
+    )
+    def test_locmem_is_rejected(self):
+        self.assertEqual(len(check_shared_caches(None)), 2)
+
+    @override_settings(
+        SHARED_CACHE_REQUIRED=True,
+        CACHES=get_caches(
+            "django.core.cache.backends.memcached.PyMemcacheCache",
+            "memcached:11211",
+        ),
+    )
+    def test_memcached_passes(self):
+        self.assertEqual(check_shared_caches(None), [])
+
+    @override_settings(
+        SHARED_CACHE_REQUIRED=False,
+        CACHES=get_caches(
+            "django.core.cache.backends.locmem.LocMemCache", "check"
+        ),
+    )
+    def test_local_cache_allowed_when_not_required(self):
+        self.assertEqual(check_shared_caches(None), [])
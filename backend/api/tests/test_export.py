@@ -0,0 +1,81 @@
+import csv
+import io
+
+from rest_framework.test import APIClient
+
+from api.tests.fixtures import FoodgramTestCase
+from recipes.models import ShoppingCart
+
+
+class ShoppingCartExportTest(FoodgramTestCase):
+    """Выгрузка списка покупок в txt, csv и pdf."""
+
+    url = "/api/recipes/download_shopping_cart/"
+
+    def setUp(self):
+        super().setUp()
+        self.create_catalog()
+        self.user = self.create_user(0)
+        # Рецепты 0 и 2 делят ингредиент 2: количества суммируются.
+        self.recipes = self.create_recipes([self.user], 4)
+        for recipe in (self.recipes[0], self.recipes[2]):
+            ShoppingCart.objects.create(user=self.user, recipe=recipe)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def download(self, file_format=None):
+        url = self.url if file_format is None else (
+            f"{self.url}?format={file_format}"
+        )
+        response = self.client.get(url)
+        body = b"".join(getattr(response, "streaming_content", ()))
+        return response, body or response.content
+
+    def test_txt(self):
+        response, body = self.download()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response["Content-Disposition"],
+            "attachment; filename=user0_shopping_cart.txt",
+        )
+        lines = body.decode().splitlines()
+        self.assertEqual(lines[0], "Список покупок пользователя user0:")
+        self.assertEqual(
+            lines[2:],
+            [
+                "Ингредиент 0 - 10/г",
+                "Ингредиент 1 - 11/г",
+                "Ингредиент 2 - 22/г",
+                "Ингредиент 3 - 11/г",
+                "Ингредиент 4 - 12/г",
+            ],
+        )
+
+    def test_csv(self):
+        response, body = self.download("csv")
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.reader(io.StringIO(body.decode("utf-8-sig"))))
+        self.assertEqual(
+            rows[0], ["Ингредиент", "Количество", "Единица измерения"]
+        )
+        self.assertIn(["Ингредиент 2", "22", "г"], rows)
+        self.assertEqual(len(rows), 6)
+
+    def test_pdf_embeds_font_subset(self):
+        response, body = self.download("pdf")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertTrue(body.startswith(b"%PDF-"))
+        self.assertIn(b"/FontFile2", body)
+        # В файл попадают только использованные глифы, а не весь шрифт.
+        self.assertLess(len(body), 100 * 1024)
+
+    def test_unknown_format_is_rejected(self):
+        for file_format in ("json", "xml"):
+            response, _ = self.download(file_format)
+            self.assertEqual(response.status_code, 400, file_format)
+
+    def test_empty_list(self):
+        ShoppingCart.objects.all().delete()
+        response, _ = self.download("txt")
+        self.assertEqual(response.status_code, 400)
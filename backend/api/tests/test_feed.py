@@ -0,0 +1,102 @@
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.tests.fixtures import FoodgramTestCase
+from recipes.models import FeedEntry, Subscribe, User
+
+
+@override_settings(FEED_BACKFILL_SIZE=3, FEED_FANOUT_LIMIT=2)
+class FeedTest(FoodgramTestCase):
+    """Лента подписок: рассылка, чтение при запросе и пагинация."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_catalog()
+        self.reader = self.create_user(0)
+        self.authors = [self.create_user(number) for number in (1, 2)]
+        self.recipes = self.create_recipes(self.authors, 10)
+        self.client = APIClient()
+        token = Token.objects.create(user=self.reader)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+    def subscribe(self, author, method="post"):
+        response = getattr(self.client, method)(
+            f"/api/users/{author.id}/subscribe/"
+        )
+        self.assertIn(response.status_code, (201, 204))
+
+    def entries(self, user=None):
+        return set(
+            FeedEntry.objects.filter(user=user or self.reader)
+            .values_list("recipe_id", flat=True)
+        )
+
+    def feed(self, limit=3):
+        ids, url = [], f"/api/recipes/feed/?limit={limit}"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            ids.extend(recipe["id"] for recipe in data["results"])
+            url = data["next"]
+        return ids
+
+    def authored(self, author):
+        return [
+            recipe.id for recipe in self.recipes
+            if recipe.author_id == author.id
+        ]
+
+    def test_subscribe_backfills_and_unsubscribe_clears(self):
+        self.subscribe(self.authors[0])
+        self.assertEqual(
+            self.entries(), set(self.authored(self.authors[0])[-3:])
+        )
+        self.subscribe(self.authors[0], "delete")
+        self.assertEqual(self.entries(), set())
+        self.assertEqual(self.feed(), [])
+
+    def test_new_recipe_is_fanned_out_to_followers(self):
+        self.subscribe(self.authors[0])
+        outsider = self.create_user(3)
+        recipe = self.create_recipes([self.authors[0]], 1)[0]
+        self.assertIn(recipe.id, self.entries())
+        self.assertEqual(self.entries(outsider), set())
+        self.assertEqual(self.feed()[0], recipe.id)
+
+    def test_popular_author_is_read_at_request_time(self):
+        self.subscribe(self.authors[0])
+        self.subscribe(self.authors[1])
+        for number in (3, 4):
+            Subscribe.objects.create(
+                user=self.create_user(number), author=self.authors[0]
+            )
+        recipe = self.create_recipes([self.authors[0]], 1)[0]
+        self.assertTrue(User.objects.get(pk=self.authors[0].pk).feed_pull)
+        self.assertFalse(FeedEntry.objects.filter(recipe=recipe).exists())
+        later = self.create_recipes([self.authors[0]], 1)[0]
+        self.assertFalse(FeedEntry.objects.filter(recipe=later).exists())
+        # Лента объединяет записи таблицы и все рецепты автора из pull.
+        expected = sorted(
+            self.authored(self.authors[0])
+            + [recipe.id, later.id]
+            + self.authored(self.authors[1])[-3:],
+            reverse=True,
+        )
+        self.assertEqual(self.feed(limit=2), expected)
+
+    def test_feed_pages_do_not_overlap(self):
+        self.subscribe(self.authors[0])
+        self.subscribe(self.authors[1])
+        expected = sorted(
+            self.authored(self.authors[0])[-3:]
+            + self.authored(self.authors[1])[-3:],
+            reverse=True,
+        )
+        for limit in (1, 4, 10):
+            self.assertEqual(self.feed(limit), expected)
+
+    def test_feed_requires_authentication(self):
+        response = APIClient().get("/api/recipes/feed/")
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,85 @@
+from django.test import RequestFactory
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.services.fragment_cache import get_fragment_keys, get_fragments
+from api.tests.fixtures import FoodgramTestCase
+from recipes.models import Favorite, RecipeIngredient
+
+
+class RecipeFragmentCacheTest(FoodgramTestCase):
+    """Общие для пользователей фрагменты рецептов и флаги поверх них."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_catalog()
+        self.author = self.create_user(0)
+        self.readers = [self.create_user(number) for number in (1, 2)]
+        self.recipes = self.create_recipes([self.author], 3)
+        self.clients = []
+        for reader in self.readers:
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=reader)}"
+            )
+            self.clients.append(client)
+
+    def get(self, client):
+        response = client.get("/api/recipes/?limit=10")
+        self.assertEqual(response.status_code, 200)
+        return {recipe["id"]: recipe for recipe in response.json()["results"]}
+
+    def cached_ids(self):
+        keys = get_fragment_keys(
+            [recipe.id for recipe in self.recipes], RequestFactory().get("/")
+        )
+        return sorted(get_fragments(keys))
+
+    def test_fragments_are_shared_and_flags_are_per_user(self):
+        Favorite.objects.create(user=self.readers[0], recipe=self.recipes[0])
+        first = self.get(self.clients[0])
+        self.assertEqual(
+            self.cached_ids(), sorted(recipe.id for recipe in self.recipes)
+        )
+        second = self.get(self.clients[1])
+        recipe_id = self.recipes[0].id
+        self.assertTrue(first[recipe_id]["is_favorited"])
+        self.assertFalse(second[recipe_id]["is_favorited"])
+        self.assertEqual(first[recipe_id]["favorites_count"], 1)
+        self.assertEqual(second[recipe_id]["favorites_count"], 1)
+        for data in (first, second):
+            data[recipe_id].pop("is_favorited")
+        self.assertEqual(first, second)
+
+    def test_recipe_and_author_changes_reset_fragments(self):
+        self.get(self.clients[0])
+        recipe = self.recipes[1]
+        RecipeIngredient.objects.filter(recipe=recipe).update(amount=99)
+        RecipeIngredient.objects.filter(recipe=recipe).first().save()
+        self.assertNotIn(recipe.id, self.cached_ids())
+        self.assertEqual(len(self.cached_ids()), 2)
+        data = self.get(self.clients[0])
+        self.assertEqual(
+            {item["amount"] for item in data[recipe.id]["ingredients"]}, {99}
+        )
+        self.author.first_name = "Новое"
+        self.author.save()
+        self.assertEqual(self.cached_ids(), [])
+        data = self.get(self.clients[1])
+        self.assertEqual(
+            {recipe["author"]["first_name"] for recipe in data.values()},
+            {"Новое"},
+        )
+
+    def test_catalog_change_resets_all_fragments(self):
+        self.get(self.clients[0])
+        ingredient = self.ingredients[0]
+        ingredient.name = "Мука"
+        ingredient.save()
+        self.assertEqual(self.cached_ids(), [])
+        data = self.get(self.clients[0])
+        names = {
+            item["name"]
+            for item in data[self.recipes[0].id]["ingredients"]
+        }
+        self.assertIn("Мука", names)
@@ -0,0 +1,58 @@
+from django.core.cache import cache
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.services.cache_helper import get_version
+from api.services.membership import (
+    Membership,
+    get_generation_key,
+    get_membership_key,
+    load_ids,
+)
+from api.tests.fixtures import FoodgramTestCase
+from recipes.models import Favorite
+
+
+class MembershipCacheTest(FoodgramTestCase):
+    """Избранное, корзина и подписки из кэша с поколениями."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_catalog()
+        self.user = self.create_user(0)
+        self.author = self.create_user(1)
+        self.recipes = self.create_recipes([self.author], 3)
+        # По токену: пользователь загружается заново в каждом запросе.
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user)}"
+        )
+
+    def test_flags_follow_api_changes(self):
+        recipe = self.recipes[0]
+        url = f"/api/recipes/{recipe.id}/"
+        self.assertFalse(self.client.get(url).json()["is_favorited"])
+        self.client.post(f"{url}favorite/")
+        self.client.post(f"/api/users/{self.author.id}/subscribe/")
+        data = self.client.get(url).json()
+        self.assertTrue(data["is_favorited"])
+        self.assertTrue(data["author"]["is_subscribed"])
+        self.client.delete(f"{url}favorite/")
+        self.assertFalse(self.client.get(url).json()["is_favorited"])
+
+    def test_stale_write_back_is_not_read(self):
+        Membership.load(self.user.id)
+        generation = get_generation_key(self.user.id, "favorites")
+        old_version = get_version(generation)
+        stale = load_ids(self.user.id, "favorites")
+        Favorite.objects.create(user=self.user, recipe=self.recipes[1])
+        # Запрос, прочитавший базу до правки, записывает массив позже.
+        cache.set(
+            get_membership_key(self.user.id, "favorites", old_version),
+            stale.tobytes(),
+        )
+        membership = Membership.load(self.user.id)
+        self.assertTrue(membership.contains("favorites", self.recipes[1].id))
+        self.assertEqual(
+            list(membership.ids("favorites")), [self.recipes[1].id]
+        )
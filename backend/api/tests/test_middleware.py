@@ -0,0 +1,33 @@
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from api.tests.fixtures import FoodgramTestCase
+
+
+@override_settings(QUERY_COUNT_HEADER=True)
+class RequestTimingTest(FoodgramTestCase):
+    """Заголовки Server-Timing и X-Query-Count."""
+
+    def test_headers(self):
+        self.create_catalog()
+        response, queries = self.count_queries("get", "/api/tags/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Query-Count"], str(queries))
+        timings = dict(
+            entry.split(";", 1)
+            for entry in response["Server-Timing"].split(", ")
+        )
+        self.assertEqual(list(timings), ["db", "view", "render", "total"])
+        self.assertIn(f'desc="{queries} queries"', timings["db"])
+        durations = {
+            name: float(value.split("dur=")[1].split(";")[0])
+            for name, value in timings.items()
+        }
+        self.assertLessEqual(
+            durations["view"] + durations["render"], durations["total"]
+        )
+
+    def test_unmatched_path(self):
+        response = APIClient().get("/api/unknown/")
+        self.assertEqual(response.status_code, 404)
+        self.assertIn("total;dur=", response["Server-Timing"])
@@ -0,0 +1,82 @@
+from django.db import transaction
+from rest_framework.test import APIClient
+
+from api.tests.fixtures import FoodgramTestCase
+from recipes.models import Favorite
+
+
+class AnonymousPageCacheTest(FoodgramTestCase):
+    """Кэш страниц для анонимов и его точечный сброс."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_catalog()
+        self.author = self.create_user(0)
+        # Рецепты 0 и 3 с первым тегом, 1 — со вторым, 2 — с третьим.
+        self.recipes = self.create_recipes([self.author], 4)
+        self.client = APIClient()
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response["X-Cache"], response.json()
+
+    def tag_page(self, tag):
+        status, data = self.get(f"/api/recipes/?tags={tag.slug}")
+        return status, sorted(recipe["id"] for recipe in data["results"])
+
+    def test_repeated_request_is_a_hit(self):
+        self.assertEqual(self.get("/api/recipes/")[0], "MISS")
+        status, data = self.get("/api/recipes/")
+        self.assertEqual(status, "HIT")
+        self.assertEqual(data["count"], 4)
+
+    def test_counters_are_current_on_hit(self):
+        recipe = self.recipes[1]
+        self.get(f"/api/recipes/{recipe.id}/")
+        Favorite.objects.create(user=self.author, recipe=recipe)
+        status, data = self.get(f"/api/recipes/{recipe.id}/")
+        self.assertEqual(status, "HIT")
+        self.assertEqual(data["favorites_count"], 1)
+
+    def test_edit_resets_only_related_pages(self):
+        first, second = self.recipes[0], self.recipes[1]
+        for url in (
+            "/api/recipes/",
+            f"/api/recipes/{first.id}/",
+            f"/api/recipes/{second.id}/",
+        ):
+            self.get(url)
+        self.tag_page(self.tags[2])
+        with transaction.atomic():
+            first.name = "Новое название"
+            first.save()
+        status, data = self.get(f"/api/recipes/{first.id}/")
+        self.assertEqual((status, data["name"]), ("MISS", "Новое название"))
+        self.assertEqual(self.get("/api/recipes/")[0], "MISS")
+        self.assertEqual(self.get(f"/api/recipes/{second.id}/")[0], "HIT")
+        self.assertEqual(self.tag_page(self.tags[2])[0], "HIT")
+
+    def test_removed_and_cleared_tags_reset_old_pages(self):
+        recipe, other = self.recipes[0], self.recipes[3]
+        old_tag, new_tag = self.tags[0], self.tags[1]
+        for name, change in (
+            ("remove", lambda: recipe.tags.remove(old_tag)),
+            ("clear", lambda: recipe.tags.clear()),
+        ):
+            with self.subTest(change=name):
+                recipe.tags.set([old_tag])
+                self.assertEqual(
+                    self.tag_page(old_tag)[1], sorted((recipe.id, other.id))
+                )
+                self.assertEqual(self.tag_page(old_tag)[0], "HIT")
+                with transaction.atomic():
+                    change()
+                    recipe.tags.add(new_tag)
+                self.assertEqual(self.tag_page(old_tag), ("MISS", [other.id]))
+                self.assertIn(recipe.id, self.tag_page(new_tag)[1])
+
+    def test_authenticated_requests_are_not_cached(self):
+        self.client.force_authenticate(self.author)
+        response = self.client.get("/api/recipes/")
+        self.assertNotIn("X-Cache", response)
@@ -0,0 +1,68 @@
+from unittest import mock
+
+from rest_framework.test import APIClient
+
+from api.services.recipe_index import recipe_index
+from api.tests.fixtures import FoodgramTestCase
+from recipes.models import RecipeIngredient
+
+
+class PantrySearchTest(FoodgramTestCase):
+    """Поиск рецептов по имеющимся ингредиентам."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_catalog()
+        self.author = self.create_user(0)
+        # Рецепт n состоит из ингредиентов n, n + 1 и n + 2.
+        self.recipes = self.create_recipes([self.author], 5)
+        recipe_index.rebuild()
+        self.client = APIClient()
+
+    def search(self, have, **params):
+        query = "&".join(f"{name}={value}" for name, value in params.items())
+        ids = ",".join(str(self.ingredients[index].id) for index in have)
+        response = self.client.get(
+            f"/api/recipes/?has_ingredients={ids}&{query}"
+        )
+        self.assertEqual(response.status_code, 200)
+        return [recipe["id"] for recipe in response.json()["results"]]
+
+    def ids(self, *indexes):
+        return [self.recipes[index].id for index in indexes]
+
+    def test_missing_ingredients_rank_results(self):
+        self.assertEqual(self.search([0, 1, 2]), self.ids(0))
+        self.assertEqual(self.search([0, 1, 2], max_missing=1), self.ids(0, 1))
+        self.assertEqual(
+            self.search([1, 2, 3], max_missing=2), self.ids(1, 2, 0, 3)
+        )
+
+    def test_exclude_ingredients(self):
+        excluded = self.ingredients[3].id
+        found = self.search(
+            [1, 2, 3], max_missing=2, exclude_ingredients=excluded
+        )
+        self.assertEqual(found, self.ids(0))
+
+    def check_index_follows_edits(self):
+        recipe = self.recipes[4]
+        self.assertEqual(self.search([0, 1, 2]), self.ids(0))
+        RecipeIngredient.objects.filter(recipe=recipe).delete()
+        for index in (0, 1):
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=self.ingredients[index], amount=1
+            )
+        self.assertEqual(self.search([0, 1, 2]), self.ids(4, 0))
+        recipe.delete()
+        self.assertEqual(self.search([0, 1]), [])
+
+    def test_index_follows_edits_by_version(self):
+        self.check_index_follows_edits()
+
+    def test_index_follows_edits_by_journal(self):
+        with mock.patch(
+            "api.services.recipe_index.is_shared_cache", return_value=True
+        ):
+            recipe_index.rebuild()
+            self.check_index_follows_edits()
@@ -0,0 +1,95 @@
+from django.core.cache import caches
+from rest_framework.test import APIClient
+
+from api.tests.fixtures import FoodgramTestCase
+
+
+class RecipeReadTest(FoodgramTestCase):
+    """Список и карточка рецепта из одного аннотированного запроса."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_catalog()
+        self.user = self.create_user(0)
+        self.authors = [self.create_user(number) for number in range(1, 4)]
+        self.recipes = self.create_recipes(self.authors, 25)
+        self.create_relations(self.user, self.recipes[:5], self.authors[:2])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # Избранное, корзина и подписки читаются один раз на пользователя.
+        self.client.get("/api/recipes/?limit=1")
+
+    def get(self, url):
+        caches["pages"].clear()
+        response, queries = self.count_queries("get", url)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), queries
+
+    def test_list_queries_do_not_depend_on_limit(self):
+        counts = {}
+        for limit in (2, 6, 20):
+            data, counts[limit] = self.get(f"/api/recipes/?limit={limit}")
+            self.assertEqual(data["count"], 25)
+            self.assertEqual(
+                [recipe["id"] for recipe in data["results"]],
+                [recipe.id for recipe in self.recipes[::-1][:limit]],
+            )
+        self.assertEqual(len(set(counts.values())), 1, counts)
+
+    def test_list_returns_user_flags(self):
+        data, _ = self.get("/api/recipes/?limit=25")
+        flags = {
+            recipe["id"]: (
+                recipe["is_favorited"],
+                recipe["is_in_shopping_cart"],
+                recipe["author"]["is_subscribed"],
+            )
+            for recipe in data["results"]
+        }
+        self.assertEqual(flags[self.recipes[0].id], (True, True, True))
+        self.assertEqual(flags[self.recipes[6].id], (False, False, True))
+        self.assertEqual(flags[self.recipes[2].id], (True, True, False))
+
+    def test_membership_filters(self):
+        favorites, _ = self.get("/api/recipes/?is_favorited=1&limit=25")
+        carts, _ = self.get("/api/recipes/?is_in_shopping_cart=1&limit=25")
+        expected = sorted(recipe.id for recipe in self.recipes[:5])
+        self.assertEqual(
+            sorted(recipe["id"] for recipe in favorites["results"]), expected
+        )
+        self.assertEqual(
+            sorted(recipe["id"] for recipe in carts["results"]), expected
+        )
+        by_author, _ = self.get(
+            f"/api/recipes/?author={self.authors[0].id}&limit=25"
+        )
+        self.assertEqual(
+            {recipe["author"]["id"] for recipe in by_author["results"]},
+            {self.authors[0].id},
+        )
+
+    def test_detail_returns_tags_and_ingredients(self):
+        recipe = self.recipes[4]
+        data, _ = self.get(f"/api/recipes/{recipe.id}/")
+        self.assertEqual(data["name"], recipe.name)
+        self.assertEqual(
+            [tag["slug"] for tag in data["tags"]],
+            [tag.slug for tag in recipe.tags.all()],
+        )
+        self.assertEqual(
+            sorted(
+                (item["name"], item["amount"]) for item in data["ingredients"]
+            ),
+            sorted(
+                (item.ingredient.name, item.amount)
+                for item in recipe.recipe_ingredients.all()
+            ),
+        )
+        self.assertTrue(data["is_favorited"])
+
+    def test_detail_queries_do_not_depend_on_ingredients(self):
+        _, few = self.get(f"/api/recipes/{self.recipes[0].id}/")
+        recipe = self.create_recipes([self.user], 1, ingredients=30)[0]
+        data, many = self.get(f"/api/recipes/{recipe.id}/")
+        self.assertEqual(len(data["ingredients"]), 30)
+        self.assertEqual(few, many)
@@ -0,0 +1,150 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.services.constants import ERROR_MESSAGES
+from api.tests.fixtures import FoodgramTestCase, image_base64
+from recipes.models import RecipeIngredient
+
+
+class RecipeWriteQueriesTest(FoodgramTestCase):
+    """Правка рецепта одним набором запросов при любом составе."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_catalog(ingredients=70)
+        self.user = self.create_user(0)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.image = image_base64()
+
+    def payload(self, ingredients, tags, amount=5):
+        return {
+            "name": "Рецепт",
+            "text": "Описание",
+            "cooking_time": 10,
+            "image": self.image,
+            "tags": [self.tags[index].id for index in tags],
+            "ingredients": [
+                {"id": ingredient.id, "amount": amount}
+                for ingredient in ingredients
+            ],
+        }
+
+    def create_recipe(self, ingredients):
+        response = self.client.post(
+            "/api/recipes/",
+            self.payload(ingredients, tags=(0, 1)),
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()["id"]
+
+    def count_patch(self, recipe_id, data):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(
+                f"/api/recipes/{recipe_id}/", data, format="json"
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(context)
+
+    def test_patch_queries_do_not_depend_on_ingredients(self):
+        counts = {}
+        for size in (3, 30):
+            recipe_id = self.create_recipe(self.ingredients[:size])
+            # Часть строк остаётся, часть меняет количество, часть новая.
+            changed = self.ingredients[size // 3:size + size // 3]
+            counts[size] = self.count_patch(
+                recipe_id, self.payload(changed, tags=(1, 2), amount=7)
+            )
+            rows = RecipeIngredient.objects.filter(recipe_id=recipe_id)
+            self.assertEqual(
+                sorted(rows.values_list("ingredient_id", "amount")),
+                [(ingredient.id, 7) for ingredient in changed],
+            )
+        self.assertEqual(counts[3], counts[30], counts)
+
+    def test_duplicate_and_unknown_ingredients_are_rejected(self):
+        recipe_id = self.create_recipe(self.ingredients[:3])
+        for ingredients, error in (
+            (
+                [self.ingredients[0], self.ingredients[0]],
+                "duplicate_ingredient",
+            ),
+            (
+                [self.ingredients[0], type(self.ingredients[0])(id=10 ** 6)],
+                "ingredient_not_found",
+            ),
+        ):
+            response = self.client.patch(
+                f"/api/recipes/{recipe_id}/",
+                self.payload(ingredients, tags=(0,)),
+                format="json",
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(
+                response.json(), {"ingredients": [ERROR_MESSAGES[error]]}
+            )
+        self.assertEqual(
+            sorted(
+                RecipeIngredient.objects.filter(
+                    recipe_id=recipe_id
+                ).values_list("ingredient_id", flat=True)
+            ),
+            [ingredient.id for ingredient in self.ingredients[:3]],
+        )
+
+    def test_create_returns_ingredients_and_tags(self):
+        response = self.client.post(
+            "/api/recipes/",
+            self.payload(self.ingredients[:2], tags=(2, 0), amount=3),
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        data = response.json()
+        self.assertEqual(
+            sorted(tag["id"] for tag in data["tags"]),
+            sorted((self.tags[0].id, self.tags[2].id)),
+        )
+        self.assertEqual(
+            sorted(
+                (item["id"], item["amount"]) for item in data["ingredients"]
+            ),
+            [(ingredient.id, 3) for ingredient in self.ingredients[:2]],
+        )
+
+    def test_patch_keeps_unchanged_rows(self):
+        recipe_id = self.create_recipe(self.ingredients[:3])
+        before = dict(
+            RecipeIngredient.objects.filter(recipe_id=recipe_id).values_list(
+                "ingredient_id", "id"
+            )
+        )
+        payload = self.payload(self.ingredients[1:4], tags=(0,))
+        payload["ingredients"][1]["amount"] = 9
+        response = self.client.patch(
+            f"/api/recipes/{recipe_id}/", payload, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        after = {
+            ingredient_id: (row_id, amount)
+            for ingredient_id, row_id, amount in (
+                RecipeIngredient.objects.filter(recipe_id=recipe_id)
+                .values_list("ingredient_id", "id", "amount")
+            )
+        }
+        first, second, third, fourth = (
+            ingredient.id for ingredient in self.ingredients[:4]
+        )
+        # Неизменная строка и строка с новым количеством не пересоздаются.
+        self.assertEqual(after[second], (before[second], 5))
+        self.assertEqual(after[third], (before[third], 9))
+        self.assertNotIn(first, after)
+        self.assertNotIn(after[fourth][0], before.values())
+        self.assertEqual(
+            sorted(
+                (item["id"], item["amount"])
+                for item in response.json()["ingredients"]
+            ),
+            [(second, 5), (third, 9), (fourth, 5)],
+        )
@@ -0,0 +1,80 @@
+from rest_framework.test import APIClient
+
+from api.tests.fixtures import FoodgramTestCase
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+
+
+class RecipeSearchTest(FoodgramTestCase):
+    """Полнотекстовый поиск: совпадения, ранжирование и обновление."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_catalog()
+        self.author = self.create_user(0)
+        self.other = self.create_user(1)
+        tomato = Ingredient.objects.create(name="Томат", measurement_unit="г")
+        self.by_name = self.create_recipe("Томатный суп", "Варить час.")
+        self.by_ingredient = self.create_recipe(
+            "Салат", "Нарезать.", ingredient=tomato
+        )
+        self.by_text = self.create_recipe("Паста", "Добавить томатный соус.")
+        self.create_recipe("Омлет", "Взбить яйца.", author=self.other)
+        self.client = APIClient()
+
+    def create_recipe(self, name, text, ingredient=None, author=None):
+        recipe = Recipe.objects.create(
+            name=name,
+            text=text,
+            author=author or self.author,
+            cooking_time=5,
+            image="recipes/images/test.png",
+        )
+        recipe.tags.set([self.tags[0]])
+        RecipeIngredient.objects.create(
+            recipe=recipe,
+            ingredient=ingredient or self.ingredients[0],
+            amount=1,
+        )
+        return recipe
+
+    def search(self, query, **params):
+        response = self.client.get(
+            "/api/recipes/", {"search": query, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return [recipe["id"] for recipe in response.json()["results"]]
+
+    def test_name_ranks_above_ingredients_and_text(self):
+        self.assertEqual(
+            self.search("томат"),
+            [self.by_name.id, self.by_ingredient.id, self.by_text.id],
+        )
+
+    def test_all_words_must_match(self):
+        self.assertEqual(self.search("томатный суп"), [self.by_name.id])
+        self.assertEqual(self.search("томатный блин"), [])
+
+    def test_search_combines_with_filters(self):
+        self.assertEqual(
+            self.search("томат", author=self.other.id), []
+        )
+        self.assertEqual(self.search("омлет", author=self.other.id), [
+            Recipe.objects.get(name="Омлет").id
+        ])
+
+    def test_documents_follow_changes(self):
+        self.by_text.name = "Грибной пирог"
+        self.by_text.save()
+        self.assertEqual(self.search("пирог"), [self.by_text.id])
+        ingredient = self.ingredients[0]
+        ingredient.name = "Шафран"
+        ingredient.save()
+        self.assertEqual(len(self.search("шафран")), 3)
+        self.by_name.delete()
+        self.assertEqual(
+            self.search("томат"), [self.by_ingredient.id, self.by_text.id]
+        )
+
+    def test_special_characters(self):
+        self.assertEqual(self.search('"*()'), [])
+        self.assertEqual(self.search('(суп" -'), [self.by_name.id])
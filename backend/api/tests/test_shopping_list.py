@@ -0,0 +1,95 @@
+from rest_framework.test import APIClient
+
+from api.services.shopping_list import rebuild_shopping_lists
+from api.tests.fixtures import FoodgramTestCase, image_base64
+from recipes.models import ShoppingListItem
+
+
+class ShoppingListTotalsTest(FoodgramTestCase):
+    """Суммы списка покупок после правок корзины и рецептов."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_catalog()
+        self.author = self.create_user(0)
+        self.users = [self.create_user(number) for number in (1, 2)]
+        self.recipes = self.create_recipes([self.author], 3)
+        self.clients = {}
+        for user in (self.author, *self.users):
+            self.clients[user] = APIClient()
+            self.clients[user].force_authenticate(user)
+
+    def cart(self, user, recipe, method="post"):
+        response = getattr(self.clients[user], method)(
+            f"/api/recipes/{recipe.id}/shopping_cart/"
+        )
+        self.assertIn(response.status_code, (201, 204), response.content)
+
+    def totals(self, user):
+        return {
+            ingredient_id - self.ingredients[0].id: (amount, count)
+            for ingredient_id, amount, count in (
+                ShoppingListItem.objects.filter(user=user).values_list(
+                    "ingredient_id", "total_amount", "recipe_count"
+                )
+            )
+        }
+
+    def assertNoDrift(self):
+        user_ids = [user.id for user in self.users]
+        self.assertEqual(rebuild_shopping_lists(user_ids, fix=False), 0)
+
+    def test_cart_add_and_remove(self):
+        # Рецепт 0: ингредиенты 0..2, рецепт 1: 1..3 (количества 10..12).
+        self.cart(self.users[0], self.recipes[0])
+        self.cart(self.users[0], self.recipes[1])
+        self.assertEqual(
+            self.totals(self.users[0]),
+            {0: (10, 1), 1: (21, 2), 2: (23, 2), 3: (12, 1)},
+        )
+        self.cart(self.users[0], self.recipes[0], method="delete")
+        self.assertEqual(
+            self.totals(self.users[0]), {1: (10, 1), 2: (11, 1), 3: (12, 1)}
+        )
+        self.assertNoDrift()
+
+    def test_recipe_edit_updates_every_cart(self):
+        for user in self.users:
+            self.cart(user, self.recipes[0])
+        response = self.clients[self.author].patch(
+            f"/api/recipes/{self.recipes[0].id}/",
+            {
+                "name": "Рецепт",
+                "text": "Описание",
+                "cooking_time": 10,
+                "image": image_base64(),
+                "tags": [self.tags[0].id],
+                "ingredients": [
+                    {"id": self.ingredients[1].id, "amount": 5},
+                    {"id": self.ingredients[7].id, "amount": 3},
+                ],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        for user in self.users:
+            self.assertEqual(self.totals(user), {1: (5, 1), 7: (3, 1)})
+        self.assertNoDrift()
+
+    def test_recipe_delete_and_batch(self):
+        response = self.clients[self.users[0]].post(
+            "/api/recipes/shopping_cart/batch/",
+            {"add": [recipe.id for recipe in self.recipes]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.totals(self.users[0])[2], (33, 3))
+        response = self.clients[self.author].delete(
+            f"/api/recipes/{self.recipes[1].id}/"
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(
+            self.totals(self.users[0]),
+            {0: (10, 1), 1: (11, 1), 2: (22, 2), 3: (11, 1), 4: (12, 1)},
+        )
+        self.assertNoDrift()
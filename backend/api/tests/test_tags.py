@@ -0,0 +1,71 @@
+from rest_framework.test import APIClient
+
+from api.services.tag_mask import tag_bit
+from api.tests.fixtures import FoodgramTestCase
+from recipes.models import Recipe, Tag
+
+
+class TagFilterTest(FoodgramTestCase):
+    """Отбор по тегам через маску и её пересчёт при смене связей."""
+
+    # Биты получают только теги с id до 63.
+    reset_sequences = True
+
+    def setUp(self):
+        super().setUp()
+        self.create_catalog()
+        self.author = self.create_user(0)
+        # Рецепт n с тегом n % 3, у рецепта 0 ещё и второй тег.
+        self.recipes = self.create_recipes([self.author], 6)
+        self.recipes[0].tags.add(self.tags[1])
+        self.client = APIClient()
+
+    def filter(self, *slugs):
+        query = "&".join(f"tags={slug}" for slug in slugs)
+        response = self.client.get(f"/api/recipes/?{query}&limit=50")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        ids = [recipe["id"] for recipe in data["results"]]
+        self.assertEqual(data["count"], len(ids))
+        return sorted(ids)
+
+    def ids(self, *indexes):
+        return sorted(self.recipes[index].id for index in indexes)
+
+    def assertMasks(self):
+        for recipe in Recipe.objects.prefetch_related("tags"):
+            expected = 0
+            for tag in recipe.tags.all():
+                expected |= tag_bit(tag.id)
+            self.assertEqual(recipe.tags_mask, expected, recipe.name)
+
+    def test_any_of_tags_without_duplicates(self):
+        self.assertEqual(self.filter("breakfast"), self.ids(0, 3))
+        self.assertEqual(
+            self.filter("breakfast", "lunch"), self.ids(0, 1, 3, 4)
+        )
+        self.assertEqual(self.filter("dinner"), self.ids(2, 5))
+
+    def test_masks_follow_tag_changes(self):
+        self.assertMasks()
+        breakfast, lunch, dinner = self.tags
+        recipe = self.recipes[1]
+        for change in (
+            lambda: recipe.tags.set([breakfast, dinner]),
+            lambda: recipe.tags.remove(dinner),
+            lambda: recipe.tags.clear(),
+            lambda: dinner.recipes.add(*self.recipes[:2]),
+            lambda: dinner.recipes.remove(self.recipes[0]),
+            lambda: lunch.recipes.clear(),
+        ):
+            change()
+            self.assertMasks()
+        self.assertEqual(self.filter("dinner"), self.ids(1, 2, 5))
+        self.assertEqual(self.filter("lunch"), [])
+
+    def test_tags_without_bit_use_join(self):
+        extra = Tag.objects.create(id=100, name="Перекус", slug="snack")
+        extra.recipes.add(self.recipes[0], self.recipes[5])
+        self.assertMasks()
+        self.assertEqual(self.filter("snack"), self.ids(0, 5))
+        self.assertEqual(self.filter("snack", "lunch"), self.ids(0, 1, 4, 5))
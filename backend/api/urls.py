@@ -5,8 +5,10 @@ from .views import (
     CustomDjoserUserViewSet,
     TagViewSet,
     IngredientViewSet,
+    MetricsView,
     RecipeViewSet,
     UserSubscriptionsViewSet,
+    UserSubscribeBatchView,
     UserSubscribeView,
     short_link_view,
 )
@@ -26,6 +28,8 @@ urlpatterns = [
         "users/<int:user_id>/subscribe/",
         UserSubscribeView.as_view(),
     ),
+    path("users/subscribe/batch/", UserSubscribeBatchView.as_view()),
+    path("metrics/", MetricsView.as_view()),
     path("", include(router.urls)),
     path("auth/", include("djoser.urls.authtoken")),
     path(
@@ -1,20 +1,26 @@
 from django_filters.rest_framework import DjangoFilterBackend
+from django.http import HttpResponse
 from django.urls import reverse
 from django.shortcuts import redirect
 from djoser.views import UserViewSet as DjoserUserViewSet
 from rest_framework import status, mixins, viewsets
 from rest_framework.decorators import action
 from rest_framework.generics import get_object_or_404
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.exceptions import ValidationError
 
 from api.filters import IngredientFilter, RecipeFilter
+from api.paginations import FeedCursorPagination, PageOrCursorPagination
+from api.parsers import RawImageParser
 from api.permissions import IsAdminAuthorOrReadOnly
+from api.renderers import CSVRenderer, PDFRenderer, TextRenderer
 from api.serializers import (
     AvatarSerializer,
+    RecipeImageSerializer,
     TagGetSerializer,
     IngredientSerializer,
     RecipeGetSerializer,
@@ -24,7 +30,22 @@ from api.serializers import (
     UserSubscribeSerializer,
     UserSubscribeRepresentSerializer,
 )
-from api.services.view_helper import RecipeProcessor, get_shopping_cart
+from api.services.feed import get_feed_queryset
+from api.services.ingredient_index import ingredient_index
+from api.services.metrics import export_metrics
+from api.services.page_cache import cache_anonymous_page
+from api.services.queryset_helper import (
+    get_recipes_limit,
+    get_recipes_queryset,
+    get_subscriptions_queryset,
+)
+from api.services.uploads import ImageUploadMixin
+from api.services.view_helper import (
+    RecipeProcessor,
+    get_catalog_response,
+    get_shopping_cart,
+    process_batch,
+)
 
 from recipes.models import (
     Tag,
@@ -32,13 +53,17 @@ from recipes.models import (
     Recipe,
     Favorite,
     ShoppingCart,
+    Subscribe,
     User,
 )
 
 
-class CustomDjoserUserViewSet(DjoserUserViewSet):
+class CustomDjoserUserViewSet(ImageUploadMixin, DjoserUserViewSet):
     """Пользователь."""
 
+    raw_image_field = "avatar"
+    image_upload_actions = ("avatar",)
+
     @action(
         detail=False, methods=["GET"], permission_classes=[IsAuthenticated]
     )
@@ -47,7 +72,8 @@ class CustomDjoserUserViewSet(DjoserUserViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=['put', 'delete'], permission_classes=[
-        IsAuthenticated], url_path='me/avatar')
+        IsAuthenticated], url_path='me/avatar', parser_classes=[
+        JSONParser, MultiPartParser, FormParser, RawImageParser])
     def avatar(self, request):
         """Управление аватаром пользователя."""
         user = request.user
@@ -104,13 +130,25 @@ class UserSubscribeView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class UserSubscribeBatchView(APIView):
+    """Подписка на пачку пользователей и отписка от неё."""
+
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        return process_batch(request, Subscribe)
+
+
 class UserSubscriptionsViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
     """Получение списка всех подписок на пользователей."""
 
     serializer_class = UserSubscribeRepresentSerializer
+    pagination_class = PageOrCursorPagination
 
     def get_queryset(self):
-        return User.objects.filter(following__user=self.request.user)
+        return get_subscriptions_queryset(
+            self.request.user, get_recipes_limit(self.request)
+        )
 
 
 class TagViewSet(ModelViewSet):
@@ -121,6 +159,9 @@ class TagViewSet(ModelViewSet):
     serializer_class = TagGetSerializer
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        return get_catalog_response(request, "tags")
+
 
 class IngredientViewSet(ModelViewSet):
     """Ингредиент."""
@@ -132,21 +173,88 @@ class IngredientViewSet(ModelViewSet):
     filterset_class = IngredientFilter
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get("name")
+        if name:
+            ingredients = ingredient_index.search(name)
+            if ingredients is not None:
+                return Response(ingredients)
+            return super().list(request, *args, **kwargs)
+        return get_catalog_response(request, "ingredients")
 
-class RecipeViewSet(ModelViewSet):
+
+class RecipeViewSet(ImageUploadMixin, ModelViewSet):
     """Рецепт."""
 
     queryset = Recipe.objects.all()
     permission_classes = (IsAdminAuthorOrReadOnly,)
     http_method_names = ["get", "post", "patch", "delete"]
+    parser_classes = (JSONParser, MultiPartParser, FormParser)
+    raw_image_field = "image"
+    image_upload_actions = ("create", "partial_update", "image")
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
+    pagination_class = PageOrCursorPagination
+
+    def get_queryset(self):
+        if self.action in ("list", "retrieve"):
+            return get_recipes_queryset()
+        return super().get_queryset()
+
+    def perform_content_negotiation(self, request, force=False):
+        # Неизвестный ?format= выгрузки отклоняется представлением (400),
+        # а не согласованием формата (404).
+        force = force or self.action == "download_shopping_cart"
+        return super().perform_content_negotiation(request, force)
 
     def get_serializer_class(self):
         if self.action in ("list", "retrieve"):
             return RecipeGetSerializer
         return RecipeCreateUpdateSerializer
 
+    @cache_anonymous_page
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_anonymous_page
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[IsAuthenticated],
+    )
+    def feed(self, request):
+        """Рецепты авторов из подписок по убыванию id, по курсору."""
+        paginator = FeedCursorPagination()
+        queryset = get_feed_queryset(
+            request.user,
+            paginator.decode_cursor(request),
+            paginator.get_page_size(request) + 1,
+        )
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = RecipeGetSerializer(
+            page, many=True, context=self.get_serializer_context()
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(
+        detail=True,
+        methods=["post"],
+        parser_classes=[MultiPartParser, RawImageParser],
+    )
+    def image(self, request, pk):
+        """Замена изображения рецепта файлом или телом запроса."""
+        serializer = RecipeImageSerializer(
+            self.get_object(),
+            data=request.data,
+            context={"request": request},
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
     @action(
         detail=True,
         methods=["post", "delete"],
@@ -172,12 +280,38 @@ class RecipeViewSet(ModelViewSet):
             ShoppingCartSerializer, ShoppingCart, request, pk, err_msg
         )
 
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[IsAuthenticated],
+        url_path="favorite/batch",
+    )
+    def favorite_batch(self, request):
+        """Добавление и удаление пачки рецептов в избранном."""
+        return process_batch(request, Favorite)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[IsAuthenticated],
+        url_path="shopping_cart/batch",
+    )
+    def shopping_cart_batch(self, request):
+        """Добавление и удаление пачки рецептов в списке покупок."""
+        return process_batch(request, ShoppingCart)
+
     @action(
         detail=False,
         methods=["get"],
         permission_classes=[IsAuthenticated],
+        renderer_classes=[
+            TextRenderer,
+            CSVRenderer,
+            PDFRenderer,
+        ],
     )
     def download_shopping_cart(self, request):
+        """Выгрузка списка покупок: ?format=txt|csv|pdf."""
         return get_shopping_cart(request)
 
     @action(detail=True, methods=['get'], url_path='get-link')
@@ -190,6 +324,16 @@ class RecipeViewSet(ModelViewSet):
         return Response({'short-link': short_url}, status=status.HTTP_200_OK)
 
 
+class MetricsView(APIView):
+    """Метрики в формате Prometheus для администраторов."""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        content, content_type = export_metrics()
+        return HttpResponse(content, content_type=content_type)
+
+
 def short_link_view(request, id):
     """Перенаправление на рецепт по короткой ссылке."""
     try:
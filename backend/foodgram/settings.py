@@ -31,6 +31,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -80,6 +81,115 @@ PSQL = {
 
 DATABASES = SQLITE if DEBUG else PSQL
 
+LOCAL_CACHE_BACKEND = "django.core.cache.backends.locmem.LocMemCache"
+SHARED_CACHE_BACKEND = "django.core.cache.backends.memcached.PyMemcacheCache"
+
+# default и versions должны быть общими для всех процессов и атомарными
+# (memcached, Redis): поколения создаются через add, журнал индекса
+# рецептов нумеруется через incr. Проверка api.E001 не даёт запустить
+# проект с другим кэшем; локальный кэш допустим только при DEBUG, где
+# работает один процесс.
+SHARED_CACHE_REQUIRED = (
+    os.getenv("SHARED_CACHE_REQUIRED", str(not DEBUG)) == "True"
+)
+CACHE_BACKEND = os.getenv(
+    "CACHE_BACKEND", LOCAL_CACHE_BACKEND if DEBUG else SHARED_CACHE_BACKEND
+)
+CACHE_LOCATION = os.getenv(
+    "CACHE_LOCATION", "foodgram" if DEBUG else "memcached:11211"
+)
+VERSION_CACHE_BACKEND = os.getenv("VERSION_CACHE_BACKEND", CACHE_BACKEND)
+PAGE_CACHE_BACKEND = os.getenv("PAGE_CACHE_BACKEND", LOCAL_CACHE_BACKEND)
+
+
+def get_cache_options(backend, max_entries):
+    """MAX_ENTRIES для locmem и filebased.
+
+    Клиентам memcached и Redis опции передаются как есть, а размер
+    задаётся настройками самого сервера.
+    """
+    if "memcached" in backend or "redis" in backend:
+        return {}
+    return {"MAX_ENTRIES": max_entries}
+
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": CACHE_LOCATION,
+        "OPTIONS": get_cache_options(
+            CACHE_BACKEND, int(os.getenv("CACHE_MAX_ENTRIES", 100000))
+        ),
+    },
+    # Версии (поколения) данных: бессрочные ключи, по одному на рецепт и
+    # автора. Отдельный префикс не даёт им смешаться с данными default.
+    "versions": {
+        "BACKEND": VERSION_CACHE_BACKEND,
+        "LOCATION": os.getenv(
+            "VERSION_CACHE_LOCATION",
+            "foodgram-versions" if DEBUG else CACHE_LOCATION,
+        ),
+        "KEY_PREFIX": "versions",
+        "TIMEOUT": None,
+        "OPTIONS": get_cache_options(
+            VERSION_CACHE_BACKEND,
+            int(os.getenv("VERSION_CACHE_MAX_ENTRIES", 1000000)),
+        ),
+    },
+    # Страницы и фрагменты рецептов. Поколения хранятся в общем кэше
+    # versions, поэтому кэш страниц может быть локальным.
+    "pages": {
+        "BACKEND": PAGE_CACHE_BACKEND,
+        "LOCATION": os.getenv("PAGE_CACHE_LOCATION", "foodgram-pages"),
+        "TIMEOUT": int(os.getenv("PAGE_CACHE_TIMEOUT", 300)),
+        "OPTIONS": get_cache_options(
+            PAGE_CACHE_BACKEND,
+            int(os.getenv("PAGE_CACHE_MAX_ENTRIES", 50000)),
+        ),
+    },
+}
+
+# Время жизни кэша избранного, корзины и подписок пользователя, секунды.
+MEMBERSHIP_CACHE_TIMEOUT = int(os.getenv("MEMBERSHIP_CACHE_TIMEOUT", 3600))
+
+# Максимум ингредиентов в индексе автодополнения в памяти процесса.
+INGREDIENT_INDEX_MAX_SIZE = int(os.getenv("INGREDIENT_INDEX_MAX_SIZE", 20000))
+
+# Максимум рецептов в подборе по имеющимся ингредиентам.
+PANTRY_SEARCH_LIMIT = int(os.getenv("PANTRY_SEARCH_LIMIT", 1000))
+
+# Лента подписок: авторы с большим числом подписчиков читаются при
+# запросе, новому подписчику копируются последние рецепты автора.
+FEED_FANOUT_LIMIT = int(os.getenv("FEED_FANOUT_LIMIT", 10000))
+FEED_BACKFILL_SIZE = int(os.getenv("FEED_BACKFILL_SIZE", 100))
+FEED_BATCH_SIZE = int(os.getenv("FEED_BATCH_SIZE", 1000))
+
+# Шрифт TrueType с кириллицей, встраиваемый в PDF со списком покупок.
+PDF_FONT_PATH = os.getenv(
+    "PDF_FONT_PATH", "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+)
+
+# Заголовок X-Query-Count с числом SQL-запросов в ответе.
+QUERY_COUNT_HEADER = os.getenv("QUERY_COUNT_HEADER", str(DEBUG)) == "True"
+
+# Число одинаковых SQL-запросов, при котором в лог пишется
+# предупреждение о возможном N+1.
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", 5))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "api.middleware": {
+            "handlers": ["console"],
+            "level": os.getenv("REQUEST_LOG_LEVEL", "INFO"),
+        },
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -111,6 +221,9 @@ STATIC_ROOT = BASE_DIR / "static"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Совпадает с client_max_body_size в nginx.
+MAX_IMAGE_UPLOAD_SIZE = 20 * 1024 * 1024
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = "recipes.User"
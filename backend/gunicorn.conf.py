@@ -0,0 +1,21 @@
+import os
+import shutil
+
+# Каталог файлов метрик Prometheus, общий для всех воркеров. Переменная
+# задаётся до запуска воркеров, чтобы prometheus_client её увидел.
+METRICS_DIR = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", "/tmp/foodgram_metrics"
+)
+
+
+def on_starting(server):
+    """Очистить метрики предыдущего запуска."""
+    shutil.rmtree(METRICS_DIR, ignore_errors=True)
+    os.makedirs(METRICS_DIR)
+
+
+def child_exit(server, worker):
+    """Перестать учитывать in-flight запросы завершённого воркера."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,9 +1,14 @@
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
 from django.utils.safestring import mark_safe
 from django import forms
 from django.db import models
 from django.contrib.auth.models import Group
 
+from api.services.images import get_derivative_name
+from api.services.queryset_helper import estimate_count
 from .models import (
     Favorite,
     Ingredient,
@@ -15,23 +20,112 @@ from .models import (
     User,
 )
 
+# Ниже этой оценки строки в списках админки считаются точно.
+EXACT_COUNT_LIMIT = 10000
+
 # Убираем стандартные группы пользователей
 admin.site.unregister(Group)
 
 
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор с оценкой числа строк для больших таблиц."""
+
+    @cached_property
+    def count(self):
+        return estimate_count(self.object_list, EXACT_COUNT_LIMIT)
+
+
+class FastChangeListMixin:
+    """Список без точного COUNT по всей таблице."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class AutocompleteFilter(admin.SimpleListFilter):
+    """Фильтр по внешнему ключу field с автодополнением.
+
+    Вместо списка всех значений выводится виджет autocomplete_fields,
+    который ищет по search_fields админки связанной модели.
+    """
+
+    template = "admin/autocomplete_filter.html"
+    field = None
+
+    def __init__(self, request, params, model, model_admin):
+        super().__init__(request, params, model, model_admin)
+        self.remote_field = model._meta.get_field(self.field)
+        self.admin_site = model_admin.admin_site
+
+    def lookups(self, request, model_admin):
+        return ((None, None),)
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if not value:
+            return queryset
+        if not value.isdigit():
+            return queryset.none()
+        return queryset.filter(**{f"{self.field}_id": value})
+
+    def get_widget(self):
+        field = forms.ModelChoiceField(
+            self.remote_field.remote_field.model.objects.all(),
+            required=False,
+            widget=AutocompleteSelect(
+                self.remote_field,
+                self.admin_site,
+                attrs={"onchange": "this.form.submit()", "data-width": "100%"},
+            ),
+        )
+        return field.widget.render(self.parameter_name, self.value())
+
+    def choices(self, changelist):
+        all_choice = next(super().choices(changelist))
+        all_choice["query_parts"] = (
+            (name, value)
+            for name, value in changelist.get_filters_params().items()
+            if name != self.parameter_name
+        )
+        all_choice["widget"] = self.get_widget()
+        yield all_choice
+
+
+class UserFilter(AutocompleteFilter):
+    title = "Пользователь"
+    parameter_name = field = "user"
+
+
+class AuthorFilter(AutocompleteFilter):
+    title = "Автор"
+    parameter_name = field = "author"
+
+
+class AutocompleteFilterMixin:
+    """Скрипты и стили виджета для AutocompleteFilter на странице списка."""
+
+    @property
+    def media(self):
+        return super().media + AutocompleteSelect(None, self.admin_site).media
+
+
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
-    list_display = ("id", "username", "email")
+class UserAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ("id", "username", "email", "recipes_count")
     search_fields = ("username", "email")
-    list_filter = ("username", "email")
+    list_filter = ("is_staff", "is_active")
     list_display_links = ("username",)
 
 
 @admin.register(Subscribe)
-class SubscribeAdmin(admin.ModelAdmin):
+class SubscribeAdmin(
+    AutocompleteFilterMixin, FastChangeListMixin, admin.ModelAdmin
+):
     list_display = ("id", "user", "author")
-    search_fields = ("user", "author")
-    list_filter = ("user", "author")
+    list_select_related = ("user", "author")
+    search_fields = ("user__username", "author__username")
+    list_filter = (UserFilter, AuthorFilter)
+    autocomplete_fields = ("user", "author")
 
 
 @admin.register(Tag)
@@ -42,35 +136,52 @@ class TagAdmin(admin.ModelAdmin):
 
 
 @admin.register(Ingredient)
-class IngredientAdmin(admin.ModelAdmin):
+class IngredientAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ("id", "name", "measurement_unit")
     search_fields = ("name",)
-    list_filter = ("name",)
+    list_filter = ("measurement_unit",)
     list_display_links = ("name",)
 
 
 class RecipeIngredientInline(admin.TabularInline):
     model = RecipeIngredient
     extra = 0
+    autocomplete_fields = ("ingredient",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            "recipe", "ingredient"
+        )
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
-    list_display = ("id", "name", "author", "favorites_amount", "get_img")
-    search_fields = ("name", "author")
-    list_filter = ("name", "author", "tags")
+class RecipeAdmin(
+    AutocompleteFilterMixin, FastChangeListMixin, admin.ModelAdmin
+):
+    list_display = (
+        "id",
+        "name",
+        "author",
+        "favorites_count",
+        "cart_count",
+        "get_img",
+    )
+    list_select_related = ("author",)
+    search_fields = ("name", "author__username")
+    list_filter = (AuthorFilter, "tags")
     list_display_links = ("name",)
     inlines = (RecipeIngredientInline,)
-    readonly_fields = ["favorites_amount"]
-
-    @admin.display(description="Добавлено в избранное")
-    def favorites_amount(self, obj):
-        return obj.favorites.count()
+    readonly_fields = ["favorites_count", "cart_count"]
 
     @admin.display(description="Изображение")
     def get_img(self, obj):
         if obj.image:
-            return mark_safe(f"<img src='{obj.image.url}' width=50 />")
+            url = obj.image.url
+            if obj.image_hash:
+                url = obj.image.storage.url(
+                    get_derivative_name(obj.image_hash, "thumb", "jpeg")
+                )
+            return mark_safe(f"<img src='{url}' width=50 />")
         return "-"
 
     @admin.display(description="Теги")
@@ -83,16 +194,20 @@ class RecipeAdmin(admin.ModelAdmin):
         )},
     }
 
-    autocomplete_fields = ['tags']
+    autocomplete_fields = ['tags', 'author']
 
 
 @admin.register(Favorite)
-class FavoriteAdmin(admin.ModelAdmin):
+class FavoriteAdmin(
+    AutocompleteFilterMixin, FastChangeListMixin, admin.ModelAdmin
+):
     list_display = ("id", "user", "recipe")
-    search_fields = ("user", "recipe")
+    list_select_related = ("user", "recipe")
+    search_fields = ("user__username", "recipe__name")
+    list_filter = (UserFilter,)
+    autocomplete_fields = ("user", "recipe")
 
 
 @admin.register(ShoppingCart)
-class ShoppingCartAdmin(admin.ModelAdmin):
-    list_display = ("id", "user", "recipe")
-    search_fields = ("user", "recipe")
+class ShoppingCartAdmin(FavoriteAdmin):
+    pass
@@ -0,0 +1,120 @@
+import json
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from api.services.benchmark import (
+    ENDPOINTS,
+    get_bench_params,
+    get_bench_user,
+    summarize,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Замерить задержку и число SQL-запросов эндпоинтов API через "
+        "тестовый клиент и сохранить результат в JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--user", help="Email пользователя для замеров.")
+        parser.add_argument(
+            "--only", nargs="*", help="Имена эндпоинтов для замера."
+        )
+        parser.add_argument("--output", help="Файл для результата.")
+        parser.add_argument(
+            "--compare", help="Предыдущий результат для сравнения."
+        )
+
+    def handle(self, *args, **options):
+        user = get_bench_user(options["user"])
+        if user is None:
+            raise CommandError("Нет данных, сначала выполните seed_bench.")
+        token, _ = Token.objects.get_or_create(user=user)
+        params = get_bench_params(user)
+        client = Client(HTTP_AUTHORIZATION=f"Token {token.key}")
+        results = {}
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+        ):
+            for name, method, path, _ in ENDPOINTS:
+                if options["only"] and name not in options["only"]:
+                    continue
+                results[name] = self.measure(
+                    client, method, path.format(**params), options
+                )
+        report = {
+            "meta": {
+                "created": datetime.now(timezone.utc).isoformat(),
+                "vendor": connection.vendor,
+                "repeat": options["repeat"],
+                "user": user.email,
+            },
+            "endpoints": results,
+        }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as file:
+                self.print_comparison(json.load(file), report)
+
+    @staticmethod
+    def request(client, method, path):
+        if method == "TOGGLE":
+            response = client.post(path)
+            client.delete(path)
+            return response
+        response = client.generic(method, path)
+        if response.streaming:
+            b"".join(response.streaming_content)
+        return response
+
+    def measure(self, client, method, path, options):
+        for _ in range(options["warmup"]):
+            self.request(client, method, path)
+        latencies, queries, statuses = [], [], set()
+        for _ in range(options["repeat"]):
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = self.request(client, method, path)
+                latencies.append((time.perf_counter() - started) * 1000)
+            queries.append(len(context))
+            statuses.add(response.status_code)
+        return {
+            "path": path,
+            "method": method,
+            "status": sorted(statuses),
+            "queries": max(queries),
+            "latency_ms": summarize(latencies),
+        }
+
+    def print_comparison(self, before, after):
+        self.stdout.write(
+            f"{'endpoint':32} {'p50':>16} {'p95':>16} {'queries':>10}"
+        )
+        for name, current in after["endpoints"].items():
+            previous = before["endpoints"].get(name)
+            if previous is None:
+                continue
+            cells = []
+            for key in ("p50", "p95"):
+                old = previous["latency_ms"][key]
+                new = current["latency_ms"][key]
+                cells.append(f"{old:7.2f}->{new:7.2f}")
+            cells.append(f"{previous['queries']:4}->{current['queries']:4}")
+            self.stdout.write(
+                f"{name:32} {cells[0]:>16} {cells[1]:>16} {cells[2]:>10}"
+            )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from api.services.images import build_derivatives
+from recipes.models import Recipe, User
+
+
+class Command(BaseCommand):
+    help = "Создать производные изображения рецептов и аватаров."
+
+    def handle(self, *args, **options):
+        built = 0
+        for model, image_field, hash_field in (
+            (Recipe, "image", "image_hash"),
+            (User, "avatar", "avatar_hash"),
+        ):
+            queryset = (
+                model.objects.filter(**{hash_field: ""})
+                .exclude(**{image_field: ""})
+                .exclude(**{f"{image_field}__isnull": True})
+                .only("pk", image_field)
+            )
+            for obj in queryset.iterator():
+                digest = build_derivatives(getattr(obj, image_field))
+                model.objects.filter(pk=obj.pk).update(**{hash_field: digest})
+                built += 1
+        self.stdout.write(f"Обработано изображений: {built}.")
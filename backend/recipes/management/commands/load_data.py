@@ -0,0 +1,187 @@
+import csv
+import io
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.services.catalog import schedule_catalog_version_bump
+from recipes.models import Ingredient, Tag
+
+# Поля записей по порядку столбцов CSV.
+MODEL_FIELDS = {
+    "ingredients": ("name", "measurement_unit"),
+    "tags": ("name", "slug"),
+}
+JSON_CHUNK_SIZE = 64 * 1024
+
+
+def read_csv(file, fields):
+    for row in csv.reader(file):
+        if row and row[0].strip():
+            yield dict(zip(fields, (value.strip() for value in row)))
+
+
+def read_jsonl(file, fields):
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_json(file, fields):
+    """Потоковое чтение JSON-массива объектов без загрузки файла целиком."""
+    decoder = json.JSONDecoder()
+    buffer = file.read(JSON_CHUNK_SIZE).lstrip()
+    if not buffer.startswith("["):
+        raise CommandError("Ожидается JSON-массив объектов.")
+    buffer = buffer[1:]
+    while True:
+        buffer = buffer.lstrip().lstrip(",").lstrip()
+        if buffer.startswith("]"):
+            return
+        try:
+            record, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            chunk = file.read(JSON_CHUNK_SIZE)
+            if not chunk:
+                raise CommandError("Незавершённый JSON-массив.")
+            buffer += chunk
+            continue
+        yield record
+        buffer = buffer[end:]
+
+
+READERS = {
+    ".csv": read_csv,
+    ".json": read_json,
+    ".jsonl": read_jsonl,
+}
+
+
+def batched(records, batch_size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Загрузить ингредиенты или теги из CSV, JSON или JSONL. "
+        "Повторная загрузка не создаёт дубликатов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths", nargs="*", default=["data/ingredients.csv"]
+        )
+        parser.add_argument(
+            "--model", choices=MODEL_FIELDS, default="ingredients"
+        )
+        parser.add_argument(
+            "--format",
+            choices=[suffix[1:] for suffix in READERS],
+            help="Формат файлов, по умолчанию определяется по расширению.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fields = MODEL_FIELDS[options["model"]]
+        started = time.perf_counter()
+        read = created = 0
+        for path in map(Path, options["paths"]):
+            suffix = f".{options['format']}" if options["format"] else (
+                path.suffix.lower()
+            )
+            if suffix not in READERS:
+                raise CommandError(f"Неизвестный формат файла: {path}.")
+            with open(path, encoding="utf-8", newline="") as file:
+                records = (
+                    {field: str(record[field]).strip() for field in fields}
+                    for record in READERS[suffix](file, fields)
+                )
+                with transaction.atomic():
+                    if options["model"] == "tags":
+                        file_read, file_created = self.load_tags(records)
+                    else:
+                        file_read, file_created = self.load_ingredients(
+                            records, options["batch_size"]
+                        )
+            read += file_read
+            created += file_created
+        schedule_catalog_version_bump()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Прочитано записей: {read}, добавлено: {created} "
+            f"за {elapsed:.2f} с ({read / max(elapsed, 1e-6):.0f} записей/с)."
+        )
+
+    @staticmethod
+    def load_tags(records):
+        """Теги: добавление новых и обновление названий по slug."""
+        read = created = 0
+        for record in records:
+            _, is_created = Tag.objects.update_or_create(
+                slug=record["slug"], defaults={"name": record["name"]}
+            )
+            read += 1
+            created += is_created
+        return read, created
+
+    def load_ingredients(self, records, batch_size):
+        if connection.vendor == "postgresql":
+            return self.copy_ingredients(records, batch_size)
+        read = 0
+        count_before = Ingredient.objects.count()
+        for batch in batched(records, batch_size):
+            Ingredient.objects.bulk_create(
+                (Ingredient(**record) for record in batch),
+                ignore_conflicts=True,
+            )
+            read += len(batch)
+        return read, Ingredient.objects.count() - count_before
+
+    @staticmethod
+    def copy_ingredients(records, batch_size):
+        """COPY во временную таблицу и вставка без конфликтов.
+
+        csv.writer не берёт пустые строки в кавычки, а COPY в формате csv
+        читает пустое поле без кавычек как NULL, поэтому для обоих
+        столбцов задан FORCE_NOT_NULL: пустая единица остаётся пустой
+        строкой, как при вставке через ORM.
+        """
+        table = Ingredient._meta.db_table
+        read = 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE ingredient_staging "
+                "(name text, measurement_unit text) ON COMMIT DROP"
+            )
+            for batch in batched(records, batch_size):
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                for record in batch:
+                    writer.writerow(
+                        (record["name"], record["measurement_unit"])
+                    )
+                buffer.seek(0)
+                cursor.copy_expert(
+                    "COPY ingredient_staging (name, measurement_unit) "
+                    "FROM STDIN WITH (FORMAT csv, "
+                    "FORCE_NOT_NULL (name, measurement_unit))",
+                    buffer,
+                )
+                read += len(batch)
+            cursor.execute(
+                f"INSERT INTO {table} (name, measurement_unit) "
+                "SELECT DISTINCT name, measurement_unit "
+                "FROM ingredient_staging "
+                "ON CONFLICT (name, measurement_unit) DO NOTHING"
+            )
+            return read, cursor.rowcount
@@ -1,22 +1,9 @@
-import csv
-import logging
-
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 
-from recipes.models import Ingredient
-
-
-logger = logging.getLogger(__name__)
-
 
 class Command(BaseCommand):
+    help = "Загрузить ингредиенты из data/ingredients.csv (см. load_data)."
+
     def handle(self, *args, **options):
-        with open("data/ingredients.csv", "r", encoding="utf-8") as file:
-            reader = csv.reader(file, delimiter=",")
-            ingredients_to_create = []
-            for row in reader:
-                name, unit = row
-                if name:
-                    ingredient = Ingredient(name=name, measurement_unit=unit)
-                    ingredients_to_create.append(ingredient)
-            Ingredient.objects.bulk_create(ingredients_to_create)
+        call_command("load_data", "data/ingredients.csv")
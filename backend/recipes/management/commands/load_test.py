@@ -0,0 +1,232 @@
+import importlib.util
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from api.services.benchmark import (
+    ENDPOINTS,
+    get_bench_params,
+    histogram,
+    summarize,
+)
+from recipes.models import User
+
+SERVER_START_TIMEOUT = 30
+REQUEST_TIMEOUT = 30
+
+
+class VirtualUser(threading.Thread):
+    """Пользователь, отправляющий запросы по взвешенной смеси эндпоинтов."""
+
+    def __init__(self, base_url, token, params, deadline, seed):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.headers = {"Authorization": f"Token {token}"}
+        self.params = params
+        self.deadline = deadline
+        self.rng = random.Random(seed)
+        self.samples = []
+
+    def send(self, method, path):
+        request = Request(
+            self.base_url + path, method=method, headers=self.headers
+        )
+        try:
+            with urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+                response.read()
+                return response.status
+        except HTTPError as error:
+            return error.code
+        except (URLError, OSError):
+            return 0
+
+    def run(self):
+        weights = [weight for *_, weight in ENDPOINTS]
+        while time.monotonic() < self.deadline:
+            name, method, path, _ = self.rng.choices(ENDPOINTS, weights)[0]
+            path = path.format(**self.params)
+            started = time.perf_counter()
+            if method == "TOGGLE":
+                status = self.send("POST", path)
+                self.send("DELETE", path)
+            else:
+                status = self.send(method, path)
+            self.samples.append(
+                (name, status, (time.perf_counter() - started) * 1000)
+            )
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный прогон: запустить WSGI-приложение и воспроизвести "
+        "смешанный трафик от множества одновременных пользователей."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument(
+            "--duration", type=int, default=30, help="Секунды."
+        )
+        parser.add_argument(
+            "--url",
+            help="Адрес уже запущенного сервера, например "
+            "http://127.0.0.1:8000. Без него сервер запускается локально.",
+        )
+        parser.add_argument("--bind", default="127.0.0.1:8765")
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Файл для результата в JSON.")
+
+    def handle(self, *args, **options):
+        users = list(
+            User.objects.filter(recipes__isnull=False)
+            .distinct()
+            .order_by("id")[:options["concurrency"]]
+        )
+        if not users:
+            raise CommandError("Нет данных, сначала выполните seed_bench.")
+        rng = random.Random(options["seed"])
+        sessions = [
+            (
+                Token.objects.get_or_create(user=user)[0].key,
+                get_bench_params(user, rng),
+            )
+            for user in users
+        ]
+        server = None
+        base_url = options["url"]
+        if not base_url:
+            base_url = f"http://{options['bind']}"
+            server = self.start_server(options["bind"], options["workers"])
+        try:
+            self.wait_ready(base_url, server)
+            deadline = time.monotonic() + options["duration"]
+            virtual_users = [
+                VirtualUser(
+                    base_url,
+                    *sessions[number % len(sessions)],
+                    deadline,
+                    seed=options["seed"] + number,
+                )
+                for number in range(options["concurrency"])
+            ]
+            started = time.perf_counter()
+            for virtual_user in virtual_users:
+                virtual_user.start()
+            for virtual_user in virtual_users:
+                virtual_user.join()
+            elapsed = time.perf_counter() - started
+        finally:
+            if server:
+                server.terminate()
+                server.wait(timeout=10)
+        report = self.build_report(
+            [
+                sample
+                for virtual_user in virtual_users
+                for sample in virtual_user.samples
+            ],
+            elapsed,
+            options,
+        )
+        self.print_report(report)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+
+    def start_server(self, bind, workers):
+        """gunicorn, как в up.sh, а без него встроенный сервер Django."""
+        if importlib.util.find_spec("gunicorn"):
+            command = [
+                sys.executable, "-m", "gunicorn", "foodgram.wsgi",
+                "--bind", bind, "--workers", str(workers),
+            ]
+        else:
+            self.stderr.write(
+                "gunicorn не установлен, используется runserver."
+            )
+            command = [
+                sys.executable, "manage.py", "runserver", bind, "--noreload",
+            ]
+        return subprocess.Popen(
+            command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+
+    @staticmethod
+    def wait_ready(base_url, server):
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while time.monotonic() < deadline:
+            if server and server.poll() is not None:
+                raise CommandError("Сервер завершился при запуске.")
+            try:
+                with urlopen(f"{base_url}/api/tags/", timeout=1):
+                    return
+            except (URLError, OSError):
+                time.sleep(0.2)
+        raise CommandError(f"Сервер {base_url} не отвечает.")
+
+    @staticmethod
+    def build_report(samples, elapsed, options):
+        by_endpoint = defaultdict(list)
+        for sample in samples:
+            by_endpoint[sample[0]].append(sample)
+        endpoints = {}
+        for name, endpoint_samples in sorted(by_endpoint.items()):
+            statuses = defaultdict(int)
+            for _, status, _ in endpoint_samples:
+                statuses[str(status)] += 1
+            latencies = [latency for *_, latency in endpoint_samples]
+            endpoints[name] = {
+                "requests": len(endpoint_samples),
+                "errors": sum(
+                    1 for _, status, _ in endpoint_samples
+                    if status == 0 or status >= 500
+                ),
+                "statuses": dict(statuses),
+                "latency_ms": summarize(latencies),
+                "histogram_ms": histogram(latencies),
+            }
+        errors = sum(endpoint["errors"] for endpoint in endpoints.values())
+        return {
+            "meta": {
+                "concurrency": options["concurrency"],
+                "duration": round(elapsed, 3),
+            },
+            "requests": len(samples),
+            "throughput": round(len(samples) / elapsed, 2),
+            "error_rate": round(errors / max(len(samples), 1), 4),
+            "latency_ms": summarize([latency for *_, latency in samples]),
+            "endpoints": endpoints,
+        }
+
+    def print_report(self, report):
+        self.stdout.write(
+            f"Запросов: {report['requests']}, "
+            f"{report['throughput']} запросов/с, "
+            f"ошибок: {report['error_rate']:.2%}."
+        )
+        self.stdout.write(
+            f"{'endpoint':26} {'count':>6} {'err':>4} "
+            f"{'p50':>8} {'p95':>8} {'p99':>8}  histogram"
+        )
+        for name, endpoint in report["endpoints"].items():
+            latency = endpoint["latency_ms"]
+            buckets = " ".join(
+                f"<={bound}:{count}"
+                for bound, count in endpoint["histogram_ms"].items()
+                if count
+            )
+            self.stdout.write(
+                f"{name:26} {endpoint['requests']:6} {endpoint['errors']:4} "
+                f"{latency['p50']:8.1f} {latency['p95']:8.1f} "
+                f"{latency['p99']:8.1f}  {buckets}"
+            )
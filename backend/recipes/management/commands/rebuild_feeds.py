@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from recipes.models import FeedEntry, Recipe, Subscribe, User
+
+
+class Command(BaseCommand):
+    help = "Пересобрать ленты подписок из подписок и рецептов."
+
+    def handle(self, *args, **options):
+        limit = settings.FEED_FANOUT_LIMIT
+        backfill = settings.FEED_BACKFILL_SIZE
+        followers = dict(
+            Subscribe.objects.order_by()
+            .values_list("author_id")
+            .annotate(count=Count("id"))
+        )
+        pull_ids = [
+            author_id for author_id, count in followers.items()
+            if count > limit
+        ]
+        created = 0
+        with transaction.atomic():
+            FeedEntry.objects.all().delete()
+            User.objects.filter(feed_pull=True).update(feed_pull=False)
+            User.objects.filter(id__in=pull_ids).update(feed_pull=True)
+            for author_id in followers.keys() - set(pull_ids):
+                recipe_ids = list(
+                    Recipe.objects.filter(author_id=author_id)
+                    .order_by("-id")
+                    .values_list("id", flat=True)[:backfill]
+                )
+                user_ids = Subscribe.objects.filter(
+                    author_id=author_id
+                ).values_list("user_id", flat=True)
+                entries = FeedEntry.objects.bulk_create(
+                    (
+                        FeedEntry(
+                            user_id=user_id,
+                            recipe_id=recipe_id,
+                            author_id=author_id,
+                        )
+                        for user_id in user_ids
+                        for recipe_id in recipe_ids
+                    ),
+                    batch_size=settings.FEED_BATCH_SIZE,
+                )
+                created += len(entries)
+        self.stdout.write(
+            f"Записей в лентах: {created}, авторов с чтением при запросе: "
+            f"{len(pull_ids)}."
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.services.recipe_index import recipe_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересобрать индекс подбора рецептов по ингредиентам "
+        "во всех процессах."
+    )
+
+    def handle(self, *args, **options):
+        count = recipe_index.rebuild()
+        self.stdout.write(f"Проиндексировано рецептов: {count}.")
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from api.services.search import update_search_documents
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "Пересобрать поисковые документы всех рецептов."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        ids = list(Recipe.objects.order_by("id").values_list("id", flat=True))
+        batch_size = options["batch_size"]
+        for start in range(0, len(ids), batch_size):
+            update_search_documents(ids[start:start + batch_size])
+        self.stdout.write(f"Обновлено рецептов: {len(ids)}.")
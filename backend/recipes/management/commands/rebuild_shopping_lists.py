@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from api.services.shopping_list import rebuild_shopping_lists
+from recipes.models import User
+
+
+class Command(BaseCommand):
+    help = "Пересчитать списки покупок пользователей по их корзинам."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только сообщить о расхождениях.",
+        )
+
+    def handle(self, *args, **options):
+        user_ids = list(
+            User.objects.filter(
+                Q(carts__isnull=False) | Q(shopping_list_items__isnull=False)
+            )
+            .distinct()
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        batch_size = options["batch_size"]
+        drifted = 0
+        for start in range(0, len(user_ids), batch_size):
+            with transaction.atomic():
+                drifted += rebuild_shopping_lists(
+                    user_ids[start:start + batch_size],
+                    fix=not options["dry_run"],
+                )
+        action = "Найдено" if options["dry_run"] else "Исправлено"
+        self.stdout.write(
+            f"{action} расхождений: {drifted} "
+            f"(проверено пользователей: {len(user_ids)})."
+        )
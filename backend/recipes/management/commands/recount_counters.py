@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.services.counters import recount
+from recipes.models import Recipe, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитать счётчики избранного, корзин и рецептов "
+        "и сообщить о расхождениях."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только сообщить о расхождениях.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        action = "найдено" if options["dry_run"] else "исправлено"
+        for model in (Recipe, User):
+            ids = list(
+                model.objects.order_by("id").values_list("id", flat=True)
+            )
+            drifted = 0
+            for start in range(0, len(ids), batch_size):
+                with transaction.atomic():
+                    drifted += recount(
+                        model,
+                        ids[start:start + batch_size],
+                        fix=not options["dry_run"],
+                    )
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: {action} "
+                f"расхождений {drifted} (проверено записей: {len(ids)})."
+            )
@@ -0,0 +1,233 @@
+import itertools
+import random
+import time
+from io import BytesIO
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from PIL import Image
+
+from api.services.images import build_derivatives
+from api.services.tag_mask import update_tags_masks
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Subscribe,
+    Tag,
+    User,
+)
+
+USERNAME_PREFIX = "bench_"
+BENCH_PASSWORD = "bench-password"
+BENCH_IMAGE = "recipes/bench.jpg"
+
+
+def zipf_sampler(population, exponent, rng):
+    """Выборка с распределением Ципфа: первые элементы популярнее."""
+    population = list(population)
+    rng.shuffle(population)
+    weights = itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, len(population) + 1)
+    )
+    cum_weights = list(weights)
+
+    def sample(count):
+        count = min(count, len(population))
+        chosen = set()
+        while len(chosen) < count:
+            chosen.update(
+                rng.choices(
+                    population, cum_weights=cum_weights, k=count - len(chosen)
+                )
+            )
+        return chosen
+
+    return sample
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполнить базу синтетическими пользователями, рецептами, "
+        "избранным, корзинами и подписками для замеров."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--recipes", type=int, default=2000)
+        parser.add_argument("--ingredients-per-recipe", type=int, default=8)
+        parser.add_argument("--favorites-per-user", type=int, default=20)
+        parser.add_argument("--carts-per-user", type=int, default=5)
+        parser.add_argument("--subscriptions-per-user", type=int, default=10)
+        parser.add_argument(
+            "--zipf",
+            type=float,
+            default=1.1,
+            help="Показатель распределения популярности.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--flush",
+            action="store_true",
+            help="Удалить ранее созданные синтетические данные.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        bench_users = User.objects.filter(
+            username__startswith=USERNAME_PREFIX
+        )
+        if options["flush"]:
+            bench_users.delete()
+        elif bench_users.exists():
+            raise CommandError(
+                "Синтетические данные уже есть, используйте --flush."
+            )
+        if not Ingredient.objects.exists():
+            call_command("load_data", "data/ingredients.csv")
+        if not Tag.objects.exists():
+            call_command("load_data", "data/tags.json", model="tags")
+        with transaction.atomic():
+            user_ids = self.create_users(options["users"])
+            recipe_ids = self.create_recipes(user_ids, rng, options)
+            self.create_relations(user_ids, recipe_ids, rng, options)
+        call_command("rebuild_shopping_lists", stdout=self.stdout)
+        call_command("recount_counters", stdout=self.stdout)
+        call_command("rebuild_search_index", stdout=self.stdout)
+        call_command("rebuild_recipe_index", stdout=self.stdout)
+        call_command("rebuild_feeds", stdout=self.stdout)
+        self.stdout.write(
+            f"Создано пользователей: {len(user_ids)}, рецептов: "
+            f"{len(recipe_ids)} за {time.perf_counter() - started:.1f} с."
+        )
+
+    def create_users(self, count):
+        password = make_password(BENCH_PASSWORD)
+        User.objects.bulk_create(
+            (
+                User(
+                    username=f"{USERNAME_PREFIX}{number}",
+                    email=f"{USERNAME_PREFIX}{number}@example.com",
+                    first_name="Bench",
+                    last_name=str(number),
+                    password=password,
+                )
+                for number in range(count)
+            ),
+            batch_size=self.batch_size,
+        )
+        return list(
+            User.objects.filter(username__startswith=USERNAME_PREFIX)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+
+    @staticmethod
+    def get_bench_image():
+        """Одно общее изображение для всех синтетических рецептов."""
+        if not default_storage.exists(BENCH_IMAGE):
+            buffer = BytesIO()
+            Image.new("RGB", (800, 600), "#d2691e").save(buffer, "JPEG")
+            default_storage.save(BENCH_IMAGE, ContentFile(buffer.getvalue()))
+        return BENCH_IMAGE, build_derivatives(Recipe(image=BENCH_IMAGE).image)
+
+    def create_recipes(self, user_ids, rng, options):
+        image, image_hash = self.get_bench_image()
+        pick_author = zipf_sampler(user_ids, options["zipf"], rng)
+        authors = [
+            author
+            for _ in range(options["recipes"])
+            for author in pick_author(1)
+        ]
+        Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    name=f"Рецепт {number}",
+                    text="Синтетический рецепт для замеров.",
+                    image=image,
+                    image_hash=image_hash,
+                    author_id=author,
+                    cooking_time=rng.randint(5, 180),
+                )
+                for number, author in enumerate(authors)
+            ),
+            batch_size=self.batch_size,
+        )
+        recipe_ids = list(
+            Recipe.objects.filter(author_id__in=user_ids)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        tag_ids = list(Tag.objects.values_list("id", flat=True))
+        pick_ingredients = zipf_sampler(
+            Ingredient.objects.values_list("id", flat=True),
+            options["zipf"],
+            rng,
+        )
+        RecipeTag = Recipe.tags.through
+        RecipeTag.objects.bulk_create(
+            (
+                RecipeTag(recipe_id=recipe_id, tag_id=tag_id)
+                for recipe_id in recipe_ids
+                for tag_id in rng.sample(
+                    tag_ids, rng.randint(1, len(tag_ids))
+                )
+            ),
+            batch_size=self.batch_size,
+        )
+        for start in range(0, len(recipe_ids), self.batch_size):
+            update_tags_masks(recipe_ids[start:start + self.batch_size])
+        RecipeIngredient.objects.bulk_create(
+            (
+                RecipeIngredient(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=rng.randint(1, 500),
+                )
+                for recipe_id in recipe_ids
+                for ingredient_id in pick_ingredients(
+                    rng.randint(1, options["ingredients_per_recipe"] * 2)
+                )
+            ),
+            batch_size=self.batch_size,
+        )
+        return recipe_ids
+
+    def create_relations(self, user_ids, recipe_ids, rng, options):
+        """Избранное, корзины и подписки с популярностью по Ципфу."""
+        pick_recipes = zipf_sampler(recipe_ids, options["zipf"], rng)
+        pick_authors = zipf_sampler(user_ids, options["zipf"], rng)
+        for model, per_user in (
+            (Favorite, options["favorites_per_user"]),
+            (ShoppingCart, options["carts_per_user"]),
+        ):
+            model.objects.bulk_create(
+                (
+                    model(user_id=user_id, recipe_id=recipe_id)
+                    for user_id in user_ids
+                    for recipe_id in pick_recipes(
+                        rng.randint(0, per_user * 2)
+                    )
+                ),
+                batch_size=self.batch_size,
+            )
+        Subscribe.objects.bulk_create(
+            (
+                Subscribe(user_id=user_id, author_id=author_id)
+                for user_id in user_ids
+                for author_id in pick_authors(
+                    rng.randint(0, options["subscriptions_per_user"] * 2)
+                )
+                if author_id != user_id
+            ),
+            batch_size=self.batch_size,
+        )
@@ -0,0 +1,83 @@
+# Generated by Django 3.2 on 2026-10-18 02:30
+
+from django.db import migrations, models
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    """Оставить по одному ингредиенту на пару название/единица."""
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    ShoppingListItem = apps.get_model('recipes', 'ShoppingListItem')
+    groups = (
+        Ingredient.objects.values('name', 'measurement_unit')
+        .annotate(keep_id=models.Min('id'), total=models.Count('id'))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    for group in groups:
+        keep_id = group['keep_id']
+        duplicate_ids = list(
+            Ingredient.objects.filter(
+                name=group['name'],
+                measurement_unit=group['measurement_unit'],
+            )
+            .exclude(id=keep_id)
+            .values_list('id', flat=True)
+        )
+        # Строки одного рецепта с копиями ингредиента сливаются в одну
+        # с суммой количеств: сначала удаляются лишние строки, затем
+        # оставшаяся переводится на сохраняемый ингредиент.
+        recipe_rows = {}
+        for row in RecipeIngredient.objects.filter(
+            ingredient_id__in=[keep_id, *duplicate_ids]
+        ).order_by('id'):
+            recipe_rows.setdefault(row.recipe_id, []).append(row)
+        for rows in recipe_rows.values():
+            kept = next(
+                (row for row in rows if row.ingredient_id == keep_id),
+                rows[0],
+            )
+            if len(rows) == 1 and kept.ingredient_id == keep_id:
+                continue
+            RecipeIngredient.objects.filter(
+                id__in=[row.id for row in rows if row is not kept]
+            ).delete()
+            kept.amount = sum(row.amount for row in rows)
+            kept.ingredient_id = keep_id
+            kept.save(update_fields=['amount', 'ingredient'])
+        # Рецепт с обеими копиями теперь учитывается одной строкой, поэтому
+        # строки списков покупок не складываются, а считаются заново.
+        ShoppingListItem.objects.filter(
+            ingredient_id__in=[keep_id, *duplicate_ids]
+        ).delete()
+        ShoppingListItem.objects.bulk_create(
+            ShoppingListItem(
+                user_id=row['recipe__carts__user_id'],
+                ingredient_id=keep_id,
+                total_amount=row['total_amount'],
+                recipe_count=row['recipe_count'],
+            )
+            for row in RecipeIngredient.objects.filter(
+                ingredient_id=keep_id, recipe__carts__user_id__isnull=False
+            )
+            .values('recipe__carts__user_id')
+            .annotate(
+                total_amount=models.Sum('amount'),
+                recipe_count=models.Count('recipe_id'),
+            )
+            .order_by()
+        )
+        Ingredient.objects.filter(id__in=duplicate_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_image_hashes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,69 @@
+from django.db import migrations
+
+# Поисковый индекс зависит от СУБД и не описывается полями модели:
+# столбец tsvector с GIN-индексом в Postgres, таблица FTS5 в SQLite.
+INGREDIENT_NAMES_SQL = """
+    SELECT {aggregate} FROM recipes_recipe_ingredient AS item
+    JOIN recipes_ingredient AS ingredient
+        ON ingredient.id = item.ingredient_id
+    WHERE item.recipe_id = recipe.id
+"""
+
+POSTGRES_FORWARD = [
+    "ALTER TABLE recipes_recipe ADD COLUMN search_vector tsvector",
+    """
+    UPDATE recipes_recipe AS recipe SET search_vector =
+        setweight(to_tsvector('russian', recipe.name), 'A')
+        || setweight(to_tsvector('russian', coalesce(({}), '')), 'B')
+        || setweight(to_tsvector('russian', recipe.text), 'C')
+    """.format(
+        INGREDIENT_NAMES_SQL.format(
+            aggregate="string_agg(ingredient.name, ' ')"
+        )
+    ),
+    "CREATE INDEX recipes_recipe_search_vector_idx "
+    "ON recipes_recipe USING GIN (search_vector)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS recipes_recipe_search_vector_idx",
+    "ALTER TABLE recipes_recipe DROP COLUMN IF EXISTS search_vector",
+]
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE recipes_recipe_fts USING fts5("
+    "name, ingredients, text, tokenize = 'unicode61 remove_diacritics 2')",
+    """
+    INSERT INTO recipes_recipe_fts (rowid, name, ingredients, text)
+    SELECT recipe.id, recipe.name, coalesce(({}), ''), recipe.text
+    FROM recipes_recipe AS recipe
+    """.format(
+        INGREDIENT_NAMES_SQL.format(
+            aggregate="group_concat(ingredient.name, ' ')"
+        )
+    ),
+]
+SQLITE_BACKWARD = ["DROP TABLE IF EXISTS recipes_recipe_fts"]
+
+STATEMENTS = {
+    "postgresql": (POSTGRES_FORWARD, POSTGRES_BACKWARD),
+    "sqlite": (SQLITE_FORWARD, SQLITE_BACKWARD),
+}
+
+
+def run_statements(direction):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for statement in STATEMENTS.get(vendor, ((), ()))[direction]:
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_stored_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_statements(0), run_statements(1)),
+    ]
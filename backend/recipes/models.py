@@ -9,6 +9,7 @@ from .validators import username_validator
 
 class FieldLength(IntEnum):
     SHORT = 7
+    HASH = 32
     MEDIUM = 150
     LONG = 200
     MAX = 254
@@ -41,6 +42,22 @@ class User(AbstractUser):
         default=None,
         verbose_name='Аватар'
     )
+    avatar_hash = models.CharField(
+        verbose_name="Хеш аватара",
+        max_length=FieldLength.HASH,
+        blank=True,
+        editable=False,
+    )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name="Количество рецептов",
+        default=0,
+        editable=False,
+    )
+    feed_pull = models.BooleanField(
+        verbose_name="Рецепты читаются в ленты при запросе",
+        default=False,
+        editable=False,
+    )
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
@@ -122,6 +139,12 @@ class Ingredient(models.Model):
         verbose_name = "Ингредиент"
         verbose_name_plural = "Ингредиенты"
         ordering = ["name"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["name", "measurement_unit"],
+                name="unique_ingredient_measurement_unit",
+            )
+        ]
 
     def __str__(self):
         return self.name
@@ -140,6 +163,12 @@ class Recipe(models.Model):
         verbose_name="Изображение",
         upload_to="recipes/",
     )
+    image_hash = models.CharField(
+        verbose_name="Хеш изображения",
+        max_length=FieldLength.HASH,
+        blank=True,
+        editable=False,
+    )
     author = models.ForeignKey(
         User,
         verbose_name="Автор",
@@ -156,11 +185,28 @@ class Recipe(models.Model):
         verbose_name="Время приготовления",
         validators=[MinValueValidator(1)],
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name="Добавлено в избранное",
+        default=0,
+        editable=False,
+    )
+    cart_count = models.PositiveIntegerField(
+        verbose_name="Добавлено в списки покупок",
+        default=0,
+        editable=False,
+    )
     tags = models.ManyToManyField(
         Tag,
         verbose_name="Теги",
         related_name="recipes",
     )
+    # Без индекса: условие tags_mask & mask > 0 индексом B-tree не
+    # обслуживается, фильтр по маске дёшев и при полном просмотре.
+    tags_mask = models.BigIntegerField(
+        verbose_name="Маска тегов",
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = "Рецепт"
@@ -276,3 +322,87 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f"{self.user} - {self.recipe}"
+
+
+class ShoppingListItem(models.Model):
+    """Модель суммы ингредиента в списке покупок пользователя."""
+
+    user = models.ForeignKey(
+        User,
+        verbose_name="Пользователь",
+        on_delete=models.CASCADE,
+        related_name="shopping_list_items",
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        verbose_name="Ингредиент",
+        on_delete=models.CASCADE,
+        related_name="shopping_list_items",
+    )
+    total_amount = models.PositiveBigIntegerField(
+        verbose_name="Количество",
+        default=0,
+    )
+    recipe_count = models.PositiveIntegerField(
+        verbose_name="Количество рецептов",
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = "Позиция списка покупок"
+        verbose_name_plural = "Позиции списков покупок"
+        db_table = "recipes_shopping_list_item"
+        ordering = ["id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "ingredient"],
+                name="unique_user_shopping_list_ingredient",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.ingredient_id}: {self.total_amount}"
+
+
+class FeedEntry(models.Model):
+    """Модель записи ленты рецептов подписок пользователя."""
+
+    user = models.ForeignKey(
+        User,
+        verbose_name="Пользователь",
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name="Рецепт",
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name="Автор",
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+
+    class Meta:
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Записи лент"
+        db_table = "recipes_feed_entry"
+        ordering = ["-recipe"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "recipe"],
+                name="unique_user_feed_recipe",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "author"],
+                name="recipes_feed_user_author_idx",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.recipe_id}"
@@ -12,17 +12,9 @@ python manage.py migrate
 echo "from django.contrib.auth import get_user_model; User = get_user_model();
 User.objects.create_superuser('$ADMIN_USERNAME', '$ADMIN_EMAIL', '$ADMIN_PASSWORD')" | python manage.py shell
 
-# Создать теги
-add_tag() {
-    name="$1"
-    slug="$2"
-
-    echo "from recipes.models import Tag;
-Tag.objects.create(name='$name', slug='$slug')" | python manage.py shell
-}
-add_tag "Завтрак" "breakfast"
-add_tag "Обед" "lunch"
-add_tag "Ужин" "dinner"
+# Загрузить теги и ингредиенты (повторный запуск не создаёт дубликатов)
+python manage.py load_data --model tags data/tags.json
+python manage.py load_data data/ingredients.csv
 
 # Запустить сервер
-gunicorn --bind 0.0.0.0:8000 foodgram.wsgi
\ No newline at end of file
+gunicorn --config gunicorn.conf.py --bind 0.0.0.0:8000 foodgram.wsgi
\ No newline at end of file